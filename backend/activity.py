@@ -0,0 +1,106 @@
+# activity.py
+# Per-user daily activity counters (user_activity_counts) for the analytics timeline.
+# Write endpoints call record_activity in the same transaction as their change, so the
+# timeline is one range scan over the (user_id, day, type) primary key.
+# Prune old days with:  python activity.py
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from dotenv import load_dotenv
+
+from models import DailyPractice, IncorrectAnswer, LearnedFlashcard, QuizResult, Reminder, UserActivityCount
+
+load_dotenv()
+
+RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", 365))
+
+# type -> (user column, date/datetime column) of the table the counter mirrors
+SOURCES = {
+    "learned": (LearnedFlashcard.user_id, LearnedFlashcard.learned_at),
+    "daily_practice": (DailyPractice.user_id, DailyPractice.practice_date),
+    "incorrect": (IncorrectAnswer.user_id, IncorrectAnswer.created_at),
+    "quiz": (QuizResult.user_id, QuizResult.created_at),
+    "reminder": (Reminder.user_id, Reminder.remind_at),
+}
+
+
+def _upsert_insert(db):
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(UserActivityCount)
+    return postgresql.insert(UserActivityCount)
+
+
+def record_activity(db, user_id: int, activity_type: str, day, delta: int = 1):
+    """Adds delta (negative for deletes) to the user's counter for that day. Doesn't commit."""
+    if isinstance(day, datetime):
+        day = day.date()
+    stmt = _upsert_insert(db).values(user_id=user_id, day=day, type=activity_type, count=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "day", "type"],
+        set_={"count": UserActivityCount.count + stmt.excluded["count"]},
+    )
+    db.execute(stmt)
+
+
+def record_deleted(db, user_id: int, activity_type: str, where):
+    """Decrements the counters for rows about to be bulk deleted (`where` selects them)."""
+    user_col, day_col = SOURCES[activity_type]
+    day = func.date(day_col)
+    rows = db.execute(select(day, func.count()).where(user_col == user_id, where).group_by(day)).all()
+    for row_day, count in rows:
+        if isinstance(row_day, str):  # sqlite's date() returns text
+            row_day = date.fromisoformat(row_day)
+        record_activity(db, user_id, activity_type, row_day, -count)
+
+
+def get_timeline(db, user_id: int, start_date: date):
+    """[(day, type, count)] from start_date on, ordered by day."""
+    return db.execute(
+        select(UserActivityCount.day, UserActivityCount.type, UserActivityCount.count)
+        .where(
+            UserActivityCount.user_id == user_id,
+            UserActivityCount.day >= start_date,
+            UserActivityCount.count > 0,
+        )
+        .order_by(UserActivityCount.day, UserActivityCount.type)
+    ).all()
+
+
+def backfill(conn):
+    """Builds the counters from the source tables. Does nothing once the table has rows."""
+    if conn.execute(select(func.count()).select_from(UserActivityCount)).scalar():
+        return 0
+    total = 0
+    for activity_type, (user_col, day_col) in SOURCES.items():
+        day = func.date(day_col)
+        grouped = (
+            select(user_col, day, literal(activity_type), func.count())
+            .where(user_col.is_not(None), day_col.is_not(None))
+            .group_by(user_col, day)
+        )
+        total += conn.execute(
+            insert(UserActivityCount).from_select(["user_id", "day", "type", "count"], grouped)
+        ).rowcount
+    return total
+
+
+def prune(db, retention_days: int = RETENTION_DAYS):
+    """Deletes counters older than the retention window, and zeroed ones."""
+    cutoff = datetime.utcnow().date() - timedelta(days=retention_days)
+    return db.execute(
+        delete(UserActivityCount).where(or_(UserActivityCount.day < cutoff, UserActivityCount.count <= 0))
+    ).rowcount
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        removed = prune(db)
+        db.commit()
+        print(f"✅ Pruned {removed} activity counters older than {RETENTION_DAYS} days")
+    finally:
+        db.close()
@@ -0,0 +1,132 @@
+# admission.py
+# Per-route concurrency limits with a bounded wait queue. Requests that can't be
+# admitted fail fast with 503 + Retry-After instead of piling up in the threadpool.
+import asyncio
+import math
+
+import metrics
+
+metrics.describe("admission_in_flight", "gauge", "Requests currently running per route group")
+metrics.describe("admission_queue_depth", "gauge", "Requests waiting for a slot per route group")
+metrics.describe("admission_admitted_total", "counter", "Requests admitted per route group")
+metrics.describe("admission_rejected_total", "counter", "Requests rejected with 503 per route group and reason")
+
+
+class RouteLimit:
+    def __init__(self, prefix: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.prefix = prefix
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, math.ceil(queue_timeout))
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _publish(self):
+        metrics.set_gauge("admission_in_flight", self.in_flight, route=self.prefix)
+        metrics.set_gauge("admission_queue_depth", self.waiting, route=self.prefix)
+
+
+def parse_limits(spec: str):
+    """
+    Parses "prefix=max_concurrent:max_queue:queue_timeout;..." e.g.
+    "/predict=4:16:5;/learn/api/user/analytics=8:32:5".
+    """
+    limits = []
+    for part in filter(None, (p.strip() for p in spec.split(";"))):
+        prefix, _, values = part.partition("=")
+        max_concurrent, max_queue, queue_timeout = values.split(":")
+        limits.append(RouteLimit(prefix.strip(), int(max_concurrent), int(max_queue), float(queue_timeout)))
+    return limits
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app, limits):
+        self.app = app
+        # Longest prefix wins
+        self.limits = sorted(limits, key=lambda l: len(l.prefix), reverse=True)
+
+    def _match(self, path: str):
+        for limit in self.limits:
+            if path == limit.prefix or path.startswith(limit.prefix.rstrip("/") + "/"):
+                return limit
+        return None
+
+    async def _reject(self, send, limit: RouteLimit, reason: str):
+        metrics.inc("admission_rejected_total", route=limit.prefix, reason=reason)
+        body = b'{"detail":"Server is busy, please retry later"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(limit.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        limit = self._match(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        queued = limit.semaphore.locked()
+        if queued:
+            if limit.waiting >= limit.max_queue:
+                await self._reject(send, limit, "queue_full")
+                return
+            limit.waiting += 1
+            limit._publish()
+            try:
+                await asyncio.wait_for(limit.semaphore.acquire(), timeout=limit.queue_timeout)
+            except asyncio.TimeoutError:
+                await self._reject(send, limit, "queue_timeout")
+                return
+            finally:
+                limit.waiting -= 1
+                limit._publish()
+        else:
+            await limit.semaphore.acquire()
+
+        try:
+            if queued:
+                # The client may have given up while we were queued; don't do the work for nobody
+                first_message = await _poll_receive(receive)
+                if first_message is not None and first_message["type"] == "http.disconnect":
+                    metrics.inc("admission_rejected_total", route=limit.prefix, reason="client_gone")
+                    return
+                receive = _replay(first_message, receive)
+
+            limit.in_flight += 1
+            limit._publish()
+            metrics.inc("admission_admitted_total", route=limit.prefix)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                limit.in_flight -= 1
+                limit._publish()
+        finally:
+            limit.semaphore.release()
+
+
+async def _poll_receive(receive, timeout: float = 0.005):
+    try:
+        return await asyncio.wait_for(receive(), timeout=timeout)
+    except asyncio.TimeoutError:
+        return None
+
+
+def _replay(message, receive):
+    if message is None:
+        return receive
+    pending = [message]
+
+    async def wrapped():
+        if pending:
+            return pending.pop()
+        return await receive()
+
+    return wrapped
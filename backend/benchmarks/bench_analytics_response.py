@@ -0,0 +1,90 @@
+# bench_analytics_response.py
+# Encode time and bytes-on-wire for a /learn/api/user/analytics sized payload.
+# Run from the backend folder:  python benchmarks/bench_analytics_response.py
+import os
+import sys
+import json
+import gzip
+import random
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from responses import FastJSONResponse, brotli
+
+ROUNDS = 200
+
+
+def build_payload(days=30, tags=120, levels=5):
+    """Synthetic analytics payload shaped like get_user_analytics() for a heavy user."""
+    now = datetime.utcnow()
+    tag_names = [f"tag_{i}" for i in range(tags)]
+    types = ["learned", "daily_practice", "incorrect", "quiz", "reminder"]
+    return {
+        "quiz_scores": [{"date": now - timedelta(days=i), "score": random.randint(0, 100)} for i in range(10)],
+        "learned_flashcards_by_level": [{"level": l, "count": random.randint(0, 500)} for l in range(1, levels + 1)],
+        "learned_tags": [{"tag": t, "count": random.randint(0, 50)} for t in tag_names],
+        "daily_practice_tags": [{"tag": t, "count": random.randint(0, 50)} for t in tag_names],
+        "incorrect_tags": [{"tag": t, "count": random.randint(0, 50)} for t in tag_names],
+        "likes": 42,
+        "dislikes": 7,
+        "feedback_by_level": [{"level": l, "likes": 3, "dislikes": 1} for l in range(1, levels + 1)],
+        "learned_tags_by_level": [
+            {"level": l, "tag": t, "count": random.randint(0, 20)}
+            for l in range(1, levels + 1) for t in tag_names
+        ],
+        "incorrect_by_level": [{"level": l, "count": random.randint(0, 80)} for l in range(1, levels + 1)],
+        "quiz_performance": [
+            {"level": l, "average_score": 71.25, "best_score": 100, "attempts": 12}
+            for l in range(1, levels + 1)
+        ],
+        "daily_practice_stats": {"total_practices": 150, "completed_practices": 120, "completion_rate": 80.0},
+        "reminder_stats": {"total_reminders": 30, "sent_reminders": 25, "pending_reminders": 5},
+        "progress_timeline": [
+            {"date": (now - timedelta(days=d)).date(), "type": t, "activity_count": random.randint(1, 30)}
+            for d in range(days) for t in types
+        ],
+    }
+
+
+def default_encode(payload):
+    # What FastAPI does for a plain dict return value + starlette JSONResponse
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_encode(payload):
+    return FastJSONResponse(payload).body
+
+
+def main():
+    random.seed(0)
+    payload = build_payload()
+
+    default_body = default_encode(payload)
+    fast_body = fast_encode(payload)
+
+    t_default = timeit.timeit(lambda: default_encode(payload), number=ROUNDS) / ROUNDS
+    t_fast = timeit.timeit(lambda: fast_encode(payload), number=ROUNDS) / ROUNDS
+
+    print(f"{'encoder':<28}{'ms/response':>12}{'bytes':>10}")
+    print(f"{'jsonable_encoder + json':<28}{t_default * 1000:>12.3f}{len(default_body):>10}")
+    print(f"{'FastJSONResponse (orjson)':<28}{t_fast * 1000:>12.3f}{len(fast_body):>10}")
+    print(f"speedup: {t_default / t_fast:.1f}x")
+
+    print(f"\n{'on the wire':<28}{'bytes':>10}{'ms':>10}")
+    print(f"{'identity':<28}{len(fast_body):>10}{'-':>10}")
+    t_gz = timeit.timeit(lambda: gzip.compress(fast_body, compresslevel=6), number=ROUNDS) / ROUNDS
+    print(f"{'gzip (level 6)':<28}{len(gzip.compress(fast_body, compresslevel=6)):>10}{t_gz * 1000:>10.3f}")
+    if brotli is not None:
+        t_br = timeit.timeit(lambda: brotli.compress(fast_body, quality=5), number=ROUNDS) / ROUNDS
+        print(f"{'brotli (quality 5)':<28}{len(brotli.compress(fast_body, quality=5)):>10}{t_br * 1000:>10.3f}")
+    else:
+        print("brotli not installed, skipping")
+
+
+if __name__ == "__main__":
+    main()
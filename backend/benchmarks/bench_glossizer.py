@@ -0,0 +1,65 @@
+# bench_glossizer.py
+# Sentences/sec for the glossizer: nltk word_tokenize (old path, if installed)
+# vs the compiled tokenizer + phrase trie, cold and with the LRU cache warm.
+# Run from the backend folder:  python benchmarks/bench_glossizer.py
+import os
+import sys
+import time
+import random
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "translator"))
+
+import gloss_engine
+from gloss_engine import get_matcher, glossize, load_gloss_dict, tokenize
+
+N_SENTENCES = 20000
+N_UNIQUE = 2000
+
+gloss_dict = load_gloss_dict()
+
+
+def make_sentences():
+    random.seed(0)
+    words = list(gloss_dict.keys()) + ["the", "a", "really", "quickly", "yesterday", "!", "?", ","]
+    unique = [" ".join(random.choices(words, k=random.randint(4, 16))).capitalize() + "." for _ in range(N_UNIQUE)]
+    return [random.choice(unique) for _ in range(N_SENTENCES)]
+
+
+def rate(fn, sentences):
+    start = time.perf_counter()
+    for sentence in sentences:
+        fn(sentence)
+    return len(sentences) / (time.perf_counter() - start)
+
+
+def nltk_glossize(word_tokenize):
+    def run(sentence):
+        # Same as the old glossizer, minus punkt sentence splitting
+        return [gloss_dict[w].upper() for w in word_tokenize(sentence.lower(), preserve_line=True) if gloss_dict.get(w)]
+    return run
+
+
+def compiled_uncached(sentence):
+    return get_matcher().match(tokenize(sentence))
+
+
+def main():
+    sentences = make_sentences()
+    print(f"{N_SENTENCES} sentences, {N_UNIQUE} unique\n")
+    print(f"{'glossizer':<34}{'sentences/sec':>14}")
+
+    try:
+        from nltk.tokenize import word_tokenize
+        print(f"{'nltk word_tokenize':<34}{rate(nltk_glossize(word_tokenize), sentences):>14,.0f}")
+    except ImportError:
+        print("nltk not installed, skipping")
+
+    print(f"{'compiled tokenizer + trie':<34}{rate(compiled_uncached, sentences):>14,.0f}")
+    gloss_engine._glossize_cached.cache_clear()
+    print(f"{'trie + LRU cache':<34}{rate(glossize, sentences):>14,.0f}")
+    info = gloss_engine._glossize_cached.cache_info()
+    print(f"\ncache hits {info.hits}, misses {info.misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# bench_landmark_arrays.py
+# Per-frame cost of turning Holistic results into feature vectors: the old per-landmark
+# Python loops (with `i in FACE_SELECTION` over every face point) vs landmark_arrays.
+# Uses real landmark protobufs when mediapipe is installed, plain objects otherwise.
+# Run from the backend folder:  python benchmarks/bench_landmark_arrays.py
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "translator"))
+
+from landmark_arrays import FACE_SELECTION, keypoints_297, landmarks_1098, raw_landmarks
+
+N_FRAMES = 20000
+
+
+def make_part(rng, points):
+    values = rng.random((points, 4), dtype=np.float32)
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        part = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, v in values:
+            part.landmark.add(x=x, y=y, z=z, visibility=v)
+        return part
+    except ImportError:
+        return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z, visibility=v) for x, y, z, v in values.tolist()])
+
+
+def make_results(one_hand=False):
+    rng = np.random.default_rng(0)
+    return SimpleNamespace(
+        pose_landmarks=make_part(rng, 33),
+        face_landmarks=make_part(rng, 478),
+        left_hand_landmarks=make_part(rng, 21),
+        right_hand_landmarks=None if one_hand else make_part(rng, 21),
+    )
+
+
+def old_keypoints_297(results):
+    # Previous improved_collection / improved_detection extract_keypoints()
+    keypoints = []
+    if results.pose_landmarks:
+        for res in results.pose_landmarks.landmark:
+            keypoints.extend([res.x, res.y, res.z, res.visibility])
+    else:
+        keypoints.extend([0] * 33 * 4)
+    if results.face_landmarks:
+        for i, res in enumerate(results.face_landmarks.landmark):
+            if i in FACE_SELECTION:
+                keypoints.extend([res.x, res.y, res.z])
+    else:
+        keypoints.extend([0] * len(FACE_SELECTION) * 3)
+    for hand in (results.left_hand_landmarks, results.right_hand_landmarks):
+        if hand:
+            for res in hand.landmark:
+                keypoints.extend([res.x, res.y, res.z])
+        else:
+            keypoints.extend([0] * 21 * 3)
+    return np.array(keypoints)
+
+
+def old_landmarks_1098(results):
+    # Previous utils/extract_landmarks per-frame conversion
+    frame_data = []
+    if results.pose_landmarks:
+        frame_data.extend([(lm.x, lm.y, lm.z) for lm in results.pose_landmarks.landmark])
+    else:
+        frame_data.extend([(0, 0, 0)] * 33)
+    for hand in (results.left_hand_landmarks, results.right_hand_landmarks):
+        if hand:
+            frame_data.extend([(lm.x, lm.y, lm.z) for lm in hand.landmark])
+        else:
+            frame_data.extend([(0, 0, 0)] * 21)
+    if results.face_landmarks:
+        face = results.face_landmarks.landmark
+        frame_data.extend([(face[i].x, face[i].y, face[i].z) for i in range(0, 468, 10)])
+    else:
+        frame_data.extend([(0, 0, 0)] * (468 // 10))
+    flat = np.array(frame_data).flatten()
+    return np.concatenate([flat, np.zeros(366 * 3 - flat.shape[0])])
+
+
+def per_frame_us(fn, results):
+    start = time.perf_counter()
+    for _ in range(N_FRAMES):
+        fn(results)
+    return (time.perf_counter() - start) / N_FRAMES * 1e6
+
+
+def main():
+    print(f"{N_FRAMES} frames per case\n")
+    print(f"{'conversion':<40}{'both hands µs':>14}{'one hand µs':>13}")
+    cases = [
+        ("297: python loops (old)", old_keypoints_297),
+        ("297: keypoints_297", keypoints_297),
+        ("297: keypoints_297, reused buffer", None),
+        ("1098: python lists (old)", old_landmarks_1098),
+        ("1098: landmarks_1098", landmarks_1098),
+        ("raw: raw_landmarks", raw_landmarks),
+    ]
+    inputs = [make_results(), make_results(one_hand=True)]
+    for results in inputs:
+        assert np.allclose(old_keypoints_297(results), keypoints_297(results))
+        assert np.allclose(old_landmarks_1098(results), landmarks_1098(results))
+
+    for name, fn in cases:
+        if fn is None:
+            buffer = np.empty(297, dtype=np.float32)
+            fn = lambda results: keypoints_297(results, out=buffer)  # noqa: E731
+        timings = [per_frame_us(fn, results) for results in inputs]
+        print(f"{name:<40}{timings[0]:>14.1f}{timings[1]:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# check_keypoint_dtype.py
+# Accuracy check for KEYPOINT_DTYPE=float16 storage: stores the keypoint sequences
+# of a packed dataset (or synthetic in-range sequences when there is none) as float16,
+# reads them back as float32 and reports the error in image coordinates, in the
+# normalized model inputs and, when asl_model.h5 and tensorflow are available,
+# in the model's predictions. It also trains a small softmax-regression reference
+# classifier on float32 and on float16 storage and compares top-1 agreement and test
+# accuracy, so there is an accuracy check without asl_model.h5 / tensorflow.
+# Synthetic sequences get class structure (per-class trajectories plus signer offset
+# and noise), so their accuracy numbers are only a proxy for real data.
+# Run from the translator folder:  python ../benchmarks/check_keypoint_dtype.py [MP_Packed]
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "translator"))
+
+from landmark_arrays import COMPUTE_DTYPE, KEYPOINTS_297, LEFT_HAND_SLICE
+from augmentation import COORD_MASK
+from packed_dataset import INDEX_FILE, compute_feature_stats, load_packed
+
+MAX_SEQUENCES = 2000
+SYNTHETIC_CLASSES = 20
+TEST_SHARE = 0.2
+FRAME_SIZE = (640, 480)  # pixels, to put coordinate errors in perspective
+MODEL_FILE = "asl_model.h5"
+
+
+def load_sequences(packed_path):
+    """(X, labels) of a packed dataset, or of synthetic class-structured sequences when there is none."""
+    if os.path.exists(os.path.join(packed_path, INDEX_FILE)):
+        X, y, _ = load_packed(packed_path)
+        print(f"{min(len(X), MAX_SEQUENCES)} sequences from {packed_path} (stored as {X.dtype})")
+        rows = np.sort(np.random.default_rng(0).permutation(len(X))[:MAX_SEQUENCES])
+        return np.asarray(X[rows], dtype=COMPUTE_DTYPE), np.asarray(y)[rows]
+    print(f"No packed dataset at {packed_path}, using synthetic sequences")
+    rng = np.random.default_rng(0)
+    length = 30
+    t = np.linspace(0, 1, length)[None, :, None]
+    # Shared resting pose, small per-class motions, per-signer offsets and per-frame noise
+    base = rng.uniform(0.3, 0.7, (1, 1, KEYPOINTS_297))
+    amplitude = rng.normal(0, 0.005, (SYNTHETIC_CLASSES, 1, KEYPOINTS_297))
+    phase = rng.uniform(0, 2 * np.pi, (SYNTHETIC_CLASSES, 1, KEYPOINTS_297))
+    prototypes = base + amplitude * np.sin(2 * np.pi * t + phase)
+    labels = np.arange(MAX_SEQUENCES) % SYNTHETIC_CLASSES
+    X = prototypes[labels] + rng.normal(0, 0.03, (MAX_SEQUENCES, 1, 1)) + rng.normal(0, 0.03, (MAX_SEQUENCES, length, KEYPOINTS_297))
+    X = np.clip(X, 0, 1).astype(COMPUTE_DTYPE)
+    X[..., ~COORD_MASK] = rng.uniform(0.5, 1, X[..., ~COORD_MASK].shape)  # pose visibility
+    X[rng.random(X.shape[:2]) < 0.2, LEFT_HAND_SLICE.start:] = 0  # undetected hands
+    return X, labels
+
+
+def split_rows(labels, test_share=TEST_SHARE, seed=0):
+    """Per-class train/test split of row indices."""
+    rng = np.random.default_rng(seed)
+    train, test = [], []
+    for label in np.unique(labels):
+        members = rng.permutation(np.flatnonzero(labels == label))
+        cut = int(round(len(members) * test_share))
+        test.append(members[:cut])
+        train.append(members[cut:])
+    return np.concatenate(train), np.concatenate(test)
+
+
+def train_reference(X, labels, num_classes, steps=200, learning_rate=0.01, l2=1e-3):
+    """
+    Multinomial logistic regression on flattened, normalized sequences, trained with
+    full-batch gradient descent in float64 (deterministic). Returns predict(X) -> probabilities.
+    """
+    mean, std = X.mean(axis=0), X.std(axis=0) + 1e-6
+    features = ((X - mean) / std).reshape(len(X), -1).astype(np.float64)
+    targets = np.eye(num_classes)[labels]
+    W = np.zeros((features.shape[1], num_classes))
+    b = np.zeros(num_classes)
+
+    def probabilities(inputs):
+        logits = inputs @ W + b
+        logits -= logits.max(axis=1, keepdims=True)
+        p = np.exp(logits)
+        return p / p.sum(axis=1, keepdims=True)
+
+    for _ in range(steps):
+        error = (probabilities(features) - targets) / len(features)
+        W -= learning_rate * (features.T @ error + l2 * W)
+        b -= learning_rate * error.sum(axis=0)
+    return lambda inputs: probabilities(((inputs - mean) / std).reshape(len(inputs), -1).astype(np.float64))
+
+
+def reference_check(X, X16, labels):
+    """Top-1 agreement and test accuracy of the reference classifier for float32 vs float16 storage."""
+    labels = np.unique(labels, return_inverse=True)[1]
+    num_classes = labels.max() + 1
+    train, test = split_rows(labels)
+    model32 = train_reference(X[train], labels[train], num_classes)
+    model16 = train_reference(X16[train], labels[train], num_classes)
+    p32 = model32(X[test]).argmax(axis=1)
+    p32_on16 = model32(X16[test]).argmax(axis=1)
+    p16 = model16(X16[test]).argmax(axis=1)
+    truth = labels[test]
+    print(f"\nreference classifier ({len(train)} train / {len(test)} test sequences, {num_classes} classes):")
+    print(f"  trained on float32, float16 inputs: top-1 agreement {np.mean(p32 == p32_on16):.2%}, "
+          f"accuracy {np.mean(p32 == truth):.2%} -> {np.mean(p32_on16 == truth):.2%}")
+    print(f"  trained and tested on float16 storage: top-1 agreement with float32 {np.mean(p32 == p16):.2%}, "
+          f"accuracy {np.mean(p16 == truth):.2%}")
+
+
+def predict(model, X, batch_size=256):
+    return np.concatenate([model.predict(X[i:i + batch_size], verbose=0) for i in range(0, len(X), batch_size)])
+
+
+def main():
+    packed_path = sys.argv[1] if len(sys.argv) > 1 else "MP_Packed"
+    real_data = os.path.exists(os.path.join(packed_path, INDEX_FILE))
+    X, labels = load_sequences(packed_path)
+    X16 = X.astype(np.float16).astype(COMPUTE_DTYPE)
+    # Normalize with the training stats when there are some, like improved_detection
+    if os.path.exists("training_mean.npy"):
+        mean, std = np.load("training_mean.npy"), np.load("training_std.npy")
+    else:
+        mean, std = compute_feature_stats(X, np.arange(len(X)))
+    scale = (1 / (std + 1e-8)).astype(COMPUTE_DTYPE)
+    mean = mean.astype(COMPUTE_DTYPE)
+
+    coord_error = np.abs(X16 - X)[..., COORD_MASK]
+    input_error = np.abs((X16 - mean) * scale - (X - mean) * scale)
+    print(f"\nstorage:              {X.nbytes / 1e6:.1f} MB float32 -> {X.nbytes / 2e6:.1f} MB float16")
+    print(f"coordinate error:     max {coord_error.max():.2e}, mean {coord_error.mean():.2e}")
+    print(f"  in pixels ({FRAME_SIZE[0]}x{FRAME_SIZE[1]}): max {coord_error.max() * max(FRAME_SIZE):.2f}")
+    print(f"normalized input error (std units): max {input_error.max():.2e}, mean {input_error.mean():.2e}")
+    print(f"zeros kept (undetected parts): {np.array_equal(X == 0, X16 == 0)}")
+
+    reference_check(X, X16, labels)
+
+    if not os.path.exists(MODEL_FILE):
+        print(f"\n{MODEL_FILE} not found, skipping the check of its predictions")
+        return
+    from tensorflow.keras.models import load_model
+    model = load_model(MODEL_FILE, compile=False)
+    p32 = predict(model, (X - mean) * scale)
+    p16 = predict(model, (X16 - mean) * scale)
+    agreement = np.mean(p32.argmax(axis=1) == p16.argmax(axis=1))
+    print(f"\ntop-1 agreement float32 vs float16: {agreement:.4%}")
+    print(f"max probability difference: {np.abs(p32 - p16).max():.2e}")
+    if not real_data:
+        print("(on synthetic sequences: rerun on a real packed set before relying on this)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# bulk_loader.py
+# Bulk load path for flashcards, tags and flashcard_tags. Uses Core multi-row
+# INSERTs (or COPY on Postgres/psycopg2) committed in chunks instead of going
+# through the ORM unit of work one object at a time.
+import io
+import csv
+import os
+import time
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+
+from models import Flashcard, Tag, tag_association_table
+
+CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 5000))
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _can_copy(db: Session):
+    return db.bind.dialect.name == "postgresql" and db.bind.dialect.driver == "psycopg2"
+
+
+def _copy_rows(db: Session, table: str, columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    buffer.seek(0)
+    raw = db.connection().connection.dbapi_connection
+    with raw.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def ensure_tags(db: Session, names, chunk_size=CHUNK_SIZE):
+    """Returns {tag name: id}, inserting the names that don't exist yet."""
+    names = sorted({n.strip() for n in names if n and n.strip()})
+    tag_ids = {}
+    for chunk in _chunks(names, chunk_size):
+        tag_ids.update({name: tag_id for tag_id, name in db.execute(select(Tag.id, Tag.name).where(Tag.name.in_(chunk)))})
+
+    missing = [n for n in names if n not in tag_ids]
+    for chunk in _chunks(missing, chunk_size):
+        inserted = db.execute(insert(Tag).values([{"name": n} for n in chunk]).returning(Tag.id, Tag.name))
+        tag_ids.update({name: tag_id for tag_id, name in inserted})
+    db.commit()
+    return tag_ids, len(missing)
+
+
+def _insert_chunk(db: Session, chunk, tag_ids, use_copy):
+    """Inserts one chunk of flashcards plus their tag links; returns the number of links."""
+    if use_copy:
+        # Reserve ids up front so COPY can write flashcards and links directly
+        ids = [row[0] for row in db.execute(
+            text("SELECT nextval(pg_get_serial_sequence('flashcards', 'id')) FROM generate_series(1, :n)"),
+            {"n": len(chunk)},
+        )]
+        _copy_rows(db, "flashcards", ["id", "gloss", "video_url", "complexity"], [
+            (card_id, r["gloss"], r["video_url"], r["complexity"]) for card_id, r in zip(ids, chunk)
+        ])
+    else:
+        inserted = db.execute(
+            insert(Flashcard)
+            .values([{"gloss": r["gloss"], "video_url": r["video_url"], "complexity": r["complexity"]} for r in chunk])
+            .returning(Flashcard.id, Flashcard.video_url)
+        ).all()
+        id_by_url = {url: card_id for card_id, url in inserted}
+        ids = [id_by_url[r["video_url"]] for r in chunk]
+
+    links = {
+        (card_id, tag_ids[name.strip()])
+        for card_id, r in zip(ids, chunk)
+        for name in r["tags"]
+        if name and name.strip()
+    }
+    if links:
+        if use_copy:
+            _copy_rows(db, "flashcard_tags", ["flashcard_id", "tag_id"], sorted(links))
+        else:
+            # Links are chunked separately to stay under driver bind-parameter limits
+            for link_chunk in _chunks(sorted(links), 10000):
+                db.execute(insert(tag_association_table).values(
+                    [{"flashcard_id": f, "tag_id": t} for f, t in link_chunk]
+                ))
+    db.commit()
+    return len(links)
+
+
+def bulk_load_flashcards(db: Session, records, chunk_size=CHUNK_SIZE, use_copy=None):
+    """
+    records: list of {"gloss", "video_url", "complexity", "tags"} dicts with unique video_url.
+    Commits every `chunk_size` flashcards and returns a stats dict including rows/sec.
+    """
+    if use_copy is None:
+        use_copy = _can_copy(db)
+
+    start = time.perf_counter()
+    tag_ids, new_tags = ensure_tags(db, (name for r in records for name in r["tags"]), chunk_size)
+
+    flashcards = links = 0
+    for chunk in _chunks(records, chunk_size):
+        links += _insert_chunk(db, chunk, tag_ids, use_copy)
+        flashcards += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"   ⏩ {flashcards}/{len(records)} flashcards loaded ({flashcards / max(elapsed, 1e-9):.0f} rows/sec)")
+
+    elapsed = time.perf_counter() - start
+    total_rows = flashcards + new_tags + links
+    return {
+        "flashcards": flashcards,
+        "tags": new_tags,
+        "flashcard_tags": links,
+        "seconds": elapsed,
+        "rows_per_sec": total_rows / max(elapsed, 1e-9),
+        "method": "copy" if use_copy else "multi-row insert",
+    }
@@ -0,0 +1,302 @@
+# cache.py
+# Shared cache for catalog and per-user data. Backends: in-process LRU (default) or any
+# server speaking the Redis protocol, chosen with CACHE_URL ("memory://", "redis://host:6379/0").
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import orjson
+
+import metrics
+from responses import dumps
+
+CACHE_URL = os.getenv("CACHE_URL", "memory://")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))  # memory backend only
+KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "asl:")
+RETRY_AFTER = 5.0  # seconds to skip an unreachable cache server
+
+metrics.describe("cache_requests_total", "counter", "Cache lookups by namespace and result")
+metrics.describe("cache_hit_ratio", "gauge", "Cache hits / lookups since start, by namespace")
+metrics.describe("cache_evictions_total", "counter", "Entries evicted by the in-process LRU to stay under its size")
+metrics.describe("cache_errors_total", "counter", "Cache backend and encoding errors (treated as misses)")
+
+
+class CacheError(Exception):
+    pass
+
+
+class MemoryBackend:
+    """Per-process LRU with TTLs. Values are bytes."""
+
+    name = "memory"
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expires_at or None, value)
+
+    def _get(self, key, now):
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= now:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self.lock:
+            return [self._get(key, now) for key in keys]
+
+    def _store(self, key, value, ttl):
+        self.entries[key] = (time.monotonic() + ttl if ttl else None, value)
+        self.entries.move_to_end(key)
+        evicted = 0
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            evicted = self._store(key, value, ttl)
+        if evicted:
+            metrics.inc("cache_evictions_total", evicted, backend=self.name)
+
+    def add(self, key, value):
+        """Sets key only if it is absent; returns the value now stored."""
+        with self.lock:
+            current = self._get(key, time.monotonic())
+            if current is not None:
+                return current
+            evicted = self._store(key, value, None)
+        if evicted:
+            metrics.inc("cache_evictions_total", evicted, backend=self.name)
+        return value
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class RedisBackend:
+    """
+    Minimal Redis protocol (RESP2) client over a plain socket, one connection
+    per thread. Only GET/MGET/SET/DEL are used, so any Redis-compatible server
+    works. Evictions on this backend are reported by the server (INFO stats).
+    """
+
+    name = "redis"
+
+    def __init__(self, url, timeout=1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.local = threading.local()
+        self.down_until = 0.0
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.local.sock = sock
+        self.local.reader = sock.makefile("rb")
+        if self.password:
+            self._command("AUTH", self.password)
+        if self.db:
+            self._command("SELECT", self.db)
+
+    def _close(self):
+        sock = getattr(self.local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self.local.sock = None
+
+    @staticmethod
+    def _encode(args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    def _read_reply(self):
+        line = self.local.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise CacheError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length == -1:
+                return None
+            data = self.local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise CacheError(f"Unexpected reply: {line!r}")
+
+    def _command(self, *args):
+        self.local.sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def execute(self, *args):
+        """Runs a command, reconnecting once if the connection went away."""
+        if time.monotonic() < self.down_until:
+            raise CacheError("Cache server unavailable")
+        for attempt in (1, 2):
+            try:
+                if getattr(self.local, "sock", None) is None:
+                    self._connect()
+                return self._command(*args)
+            except OSError as e:
+                self._close()
+                if attempt == 2:
+                    # Don't make every request wait on the connect timeout while the server is down
+                    self.down_until = time.monotonic() + RETRY_AFTER
+                    raise CacheError(str(e)) from e
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return self.execute("MGET", *keys)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.execute("SET", key, value, "PX", int(ttl * 1000))
+        else:
+            self.execute("SET", key, value)
+
+    def add(self, key, value):
+        if self.execute("SET", key, value, "NX") is None:
+            current = self.execute("GET", key)
+            return current if current is not None else value
+        return value
+
+    def delete(self, key):
+        self.execute("DEL", key)
+
+
+def create_backend(url=CACHE_URL):
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemoryBackend()
+    if scheme in ("redis", "tcp"):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported CACHE_URL scheme: {scheme}")
+
+
+class Cache:
+    """
+    Namespaced JSON cache on top of a backend.
+
+    Tag invalidation: every tag has a random token stored in the backend and the
+    tokens of an entry's tags are part of its key. Invalidating a tag replaces
+    its token, so all entries written under the old one become unreachable and
+    age out through TTL/LRU. A tag token that was evicted simply gets a new
+    token, which can only cause misses, never stale hits.
+    """
+
+    def __init__(self, backend, namespace="", prefix=KEY_PREFIX):
+        self.backend = backend
+        self.namespace = namespace
+        self.prefix = prefix
+
+    def child(self, namespace):
+        return Cache(self.backend, namespace, self.prefix)
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}tag:{tag}"
+
+    def _tag_tokens(self, tags):
+        keys = [self._tag_key(tag) for tag in tags]
+        tokens = self.backend.get_many(keys)
+        for i, token in enumerate(tokens):
+            if token is None:
+                tokens[i] = self.backend.add(keys[i], uuid.uuid4().hex.encode())
+        return [t.decode() if isinstance(t, bytes) else t for t in tokens]
+
+    def _key(self, key, tags):
+        full = f"{self.prefix}{self.namespace}:{key}"
+        if tags:
+            full += "@" + ".".join(self._tag_tokens(tags))
+        return full
+
+    def _record(self, hit):
+        metrics.inc("cache_requests_total", namespace=self.namespace, result="hit" if hit else "miss")
+        hits = metrics.get("cache_requests_total", namespace=self.namespace, result="hit")
+        misses = metrics.get("cache_requests_total", namespace=self.namespace, result="miss")
+        metrics.set_gauge("cache_hit_ratio", hits / (hits + misses), namespace=self.namespace)
+
+    def get(self, key, tags=()):
+        """Returns the cached value or None (also on backend errors)."""
+        try:
+            raw = self.backend.get_many([self._key(key, tags)])[0]
+        except CacheError as e:
+            metrics.inc("cache_errors_total", backend=self.backend.name)
+            print(f"⚠️ Cache get failed: {e}")
+            raw = None
+        self._record(raw is not None)
+        return orjson.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None, tags=()):
+        try:
+            encoded = dumps(value)
+        except orjson.JSONEncodeError as e:
+            # Not cacheable: the caller already has the value, so skip the cache
+            metrics.inc("cache_errors_total", backend="encode")
+            print(f"⚠️ Cache set skipped for {self.namespace}:{key}: {e}")
+            return
+        try:
+            self.backend.set(self._key(key, tags), encoded, ttl)
+        except CacheError as e:
+            metrics.inc("cache_errors_total", backend=self.backend.name)
+            print(f"⚠️ Cache set failed: {e}")
+
+    def get_or_set(self, key, producer, ttl=None, tags=()):
+        value = self.get(key, tags)
+        if value is None:
+            value = producer()
+            self.set(key, value, ttl, tags)
+        return value
+
+    def delete(self, key, tags=()):
+        try:
+            self.backend.delete(self._key(key, tags))
+        except CacheError as e:
+            metrics.inc("cache_errors_total", backend=self.backend.name)
+            print(f"⚠️ Cache delete failed: {e}")
+
+    def invalidate_tags(self, *tags):
+        for tag in tags:
+            try:
+                self.backend.set(self._tag_key(tag), uuid.uuid4().hex.encode())
+            except CacheError as e:
+                metrics.inc("cache_errors_total", backend=self.backend.name)
+                print(f"⚠️ Cache invalidation failed for tag {tag}: {e}")
+
+
+cache = Cache(create_backend())
+catalog_cache = cache.child("catalog")
+user_cache = cache.child("user")
@@ -0,0 +1,222 @@
+# catalog.py
+# Versioned, compact snapshot of the Flashcard/Tag catalog for offline clients.
+# Deltas (?since=N) are insert-only: they carry the flashcards and tags published
+# after version N. When already-published rows change (edits, deletions, new tag
+# links on existing cards), the next version becomes a delta base and clients on
+# older versions get a full snapshot instead.
+import hashlib
+from collections import defaultdict
+
+import orjson
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from cache import catalog_cache
+from models import CatalogVersion, Flashcard, Tag, tag_association_table
+
+FLASHCARD_FIELDS = ["id", "gloss", "video_url", "complexity", "tag_ids"]
+TAG_FIELDS = ["id", "name"]
+
+CATALOG_CACHE_TTL = 3600  # seconds; entries are also keyed by catalog version
+
+# (version, since) -> encoded snapshot bytes. Only the current version is kept.
+_snapshot_cache = {}
+
+
+def get_current_version(db: Session):
+    return db.query(CatalogVersion).order_by(CatalogVersion.id.desc()).first()
+
+
+def _collect(db: Session, since: int, until: int = None):
+    tag_query = select(Tag.id, Tag.name).order_by(Tag.id)
+    card_query = select(Flashcard.id, Flashcard.gloss, Flashcard.video_url, Flashcard.complexity).order_by(Flashcard.id)
+    link_query = select(tag_association_table.c.flashcard_id, tag_association_table.c.tag_id).join(
+        Flashcard, Flashcard.id == tag_association_table.c.flashcard_id
+    )
+    # Rows not stamped by publish_catalog_version yet aren't part of any version
+    if since:
+        tag_query = tag_query.where(Tag.catalog_version > since)
+        card_query = card_query.where(Flashcard.catalog_version > since)
+        link_query = link_query.where(Flashcard.catalog_version > since)
+    else:
+        tag_query = tag_query.where(Tag.catalog_version.is_not(None))
+        card_query = card_query.where(Flashcard.catalog_version.is_not(None))
+        link_query = link_query.where(Flashcard.catalog_version.is_not(None))
+    if until is not None:
+        tag_query = tag_query.where(Tag.catalog_version <= until)
+        card_query = card_query.where(Flashcard.catalog_version <= until)
+        link_query = link_query.where(Flashcard.catalog_version <= until)
+
+    tag_ids_by_card = defaultdict(list)
+    for flashcard_id, tag_id in db.execute(link_query):
+        tag_ids_by_card[flashcard_id].append(tag_id)
+
+    tags = [[tag_id, name] for tag_id, name in db.execute(tag_query)]
+    flashcards = [
+        [card_id, gloss, video_url, complexity, sorted(tag_ids_by_card.get(card_id, ()))]
+        for card_id, gloss, video_url, complexity in db.execute(card_query)
+    ]
+    return flashcards, tags
+
+
+def encode_snapshot(db: Session, version: int, since: int = 0, until: int = None) -> bytes:
+    """
+    Encodes the catalog as rows of arrays (see FLASHCARD_FIELDS / TAG_FIELDS).
+    With since > 0 only flashcards and tags published after that version are included,
+    with until only those published up to that version.
+    """
+    flashcards, tags = _collect(db, since, until)
+    return orjson.dumps({
+        "version": version,
+        "since": since,
+        "flashcard_fields": FLASHCARD_FIELDS,
+        "tag_fields": TAG_FIELDS,
+        "flashcards": flashcards,
+        "tags": tags,
+    })
+
+
+def snapshot_since(version: CatalogVersion, since: int) -> int:
+    """The `since` actually served: 0 (full snapshot) for versions a delta can't start from."""
+    if since < 0 or since > version.id:
+        return 0  # unknown version on the client, send everything
+    if since < version.delta_base:
+        return 0  # published rows changed after the client's version
+    return since
+
+
+def snapshot_etag(version: CatalogVersion, since: int = 0) -> str:
+    """ETag of get_snapshot(db, version, since), known without building the body."""
+    since = snapshot_since(version, since)
+    if since == 0:
+        return version.etag
+    return f'"catalog-v{version.id}-since-{since}"'
+
+
+def get_snapshot(db: Session, version: CatalogVersion, since: int = 0):
+    """
+    Returns (etag, body) for the full snapshot or the delta since a version.
+    Check snapshot_etag() against If-None-Match first to skip building the body.
+    """
+    etag = snapshot_etag(version, since)
+    since = snapshot_since(version, since)
+
+    key = (version.id, since)
+    body = _snapshot_cache.get(key)
+    if body is None:
+        body = encode_snapshot(db, version.id, since)
+        for stale in [k for k in _snapshot_cache if k[0] != version.id]:
+            del _snapshot_cache[stale]
+        _snapshot_cache[key] = body
+    return etag, body
+
+
+def _version_etag(version_id: int, body: bytes) -> str:
+    return f'"catalog-v{version_id}-{hashlib.sha256(body).hexdigest()[:16]}"'
+
+
+def publish_catalog_version(db: Session) -> CatalogVersion:
+    """
+    Stamps every flashcard/tag that isn't in a version yet with a new version
+    number and records it. Call once after each import (or after editing or
+    deleting published rows, which makes the new version a delta base).
+    """
+    latest = db.get(CatalogVersion, db.query(func.max(CatalogVersion.id)).scalar() or 0)
+    unpublished = (
+        db.query(Flashcard.id).filter(Flashcard.catalog_version.is_(None)).first()
+        or db.query(Tag.id).filter(Tag.catalog_version.is_(None)).first()
+    )
+    # The rows of the latest version re-encode to its ETag unless they were changed since
+    changed = latest is not None and (
+        _version_etag(latest.id, encode_snapshot(db, latest.id, until=latest.id)) != latest.etag
+    )
+    if latest is not None and not unpublished and not changed:
+        return latest  # nothing new, keep clients' ETags valid
+    version_id = (latest.id if latest else 0) + 1
+
+    db.execute(update(Flashcard).where(Flashcard.catalog_version.is_(None)).values(catalog_version=version_id))
+    db.execute(update(Tag).where(Tag.catalog_version.is_(None)).values(catalog_version=version_id))
+    db.flush()
+
+    body = encode_snapshot(db, version_id)
+    version = CatalogVersion(
+        id=version_id,
+        etag=_version_etag(version_id, body),
+        flashcard_count=db.query(func.count(Flashcard.id)).scalar(),
+        tag_count=db.query(func.count(Tag.id)).scalar(),
+        delta_base=version_id if changed else (latest.delta_base if latest else 0),
+    )
+    db.add(version)
+    db.commit()
+
+    _snapshot_cache.clear()
+    _snapshot_cache[(version_id, 0)] = body
+    catalog_cache.invalidate_tags("catalog")
+    return version
+
+
+def current_version_id(db: Session) -> int:
+    return db.query(func.max(CatalogVersion.id)).scalar() or 0
+
+
+def _load_level_page(db: Session, level: int, offset: int, limit: int, exclude_ids=()):
+    query = db.query(Flashcard).filter(Flashcard.complexity == level)
+    if exclude_ids:
+        query = query.filter(~Flashcard.id.in_(exclude_ids))
+    total = query.count()
+    cards = query.order_by(Flashcard.id).offset(offset).limit(limit).all()
+
+    tag_names = defaultdict(list)
+    if cards:
+        rows = (
+            db.query(tag_association_table.c.flashcard_id, Tag.name)
+            .join(Tag, Tag.id == tag_association_table.c.tag_id)
+            .filter(tag_association_table.c.flashcard_id.in_([f.id for f in cards]))
+        )
+        for flashcard_id, name in rows:
+            tag_names[flashcard_id].append(name)
+    return {
+        "total": total,
+        "cards": [
+            {"id": f.id, "gloss": f.gloss, "video_url": f.video_url, "tags": tag_names.get(f.id, []), "complexity": f.complexity}
+            for f in cards
+        ],
+    }
+
+
+def get_level_page(db: Session, level: int, offset: int, limit: int, exclude_ids=()):
+    """
+    One page of a complexity level's flashcards (ordered by id) with their tag names,
+    as {"total", "cards"}. Pages are paginated in SQL; pages without exclusions are
+    the same for every user and shared through the cache.
+    """
+    if exclude_ids:
+        return _load_level_page(db, level, offset, limit, exclude_ids)
+    key = f"level:{level}:{offset}:{limit}:v{current_version_id(db)}"
+    return catalog_cache.get_or_set(
+        key, lambda: _load_level_page(db, level, offset, limit), CATALOG_CACHE_TTL, tags=("catalog",)
+    )
+
+
+def _load_tag_list(db: Session):
+    rows = (
+        db.query(Tag.id, Tag.name, func.count(tag_association_table.c.flashcard_id))
+        .outerjoin(tag_association_table, tag_association_table.c.tag_id == Tag.id)
+        .group_by(Tag.id, Tag.name)
+        .order_by(Tag.name)
+    )
+    return [{"id": tag_id, "name": name, "flashcard_count": count} for tag_id, name, count in rows]
+
+
+def get_tag_list(db: Session):
+    key = f"tags:v{current_version_id(db)}"
+    return catalog_cache.get_or_set(key, lambda: _load_tag_list(db), CATALOG_CACHE_TTL, tags=("catalog",))
+
+
+def prewarm_cache(db: Session, page_size: int = 12):
+    """Fills the cache with every level's first page and the tag list, so first requests don't pay for it."""
+    levels = [level for (level,) in db.query(Flashcard.complexity).distinct() if level is not None]
+    for level in levels:
+        get_level_page(db, level, 0, page_size)
+    get_tag_list(db)
+    return levels
@@ -0,0 +1,110 @@
+# compact_predictions.py
+# Rolls raw flashcard_predictions rows older than the retention window into
+# per-user daily counts, optionally archives them, then deletes them.
+# Safe to run repeatedly (e.g. nightly from cron):  python compact_predictions.py
+import os
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from dotenv import load_dotenv
+
+from database import SessionLocal
+from models import FlashcardPrediction, PredictionDailyCount
+
+load_dotenv()
+
+RETENTION_DAYS = int(os.getenv("PREDICTION_RETENTION_DAYS", 30))
+ARCHIVE_DIR = os.getenv("PREDICTION_ARCHIVE_DIR")  # unset = delete without archiving
+ARCHIVE_BATCH = 10000
+
+
+def _upsert_insert(db):
+    if db.bind.dialect.name == "sqlite":
+        return sqlite.insert(PredictionDailyCount)
+    return postgresql.insert(PredictionDailyCount)
+
+
+def expired(cutoff, max_id):
+    """
+    Raw rows before `cutoff`, up to id `max_id`. Rollup, archive and delete all use the
+    same bound, so rows inserted meanwhile (e.g. late batches with old client timestamps)
+    are left for the next run instead of being deleted without being counted.
+    """
+    return (FlashcardPrediction.timestamp < cutoff) & (FlashcardPrediction.id <= max_id)
+
+
+def rollup(db, cutoff, max_id):
+    """Adds counts of expired raw rows to prediction_daily_counts."""
+    day = func.date(FlashcardPrediction.timestamp)
+    grouped = (
+        select(
+            FlashcardPrediction.user_id,
+            day,
+            FlashcardPrediction.prediction,
+            func.count(FlashcardPrediction.id),
+        )
+        .where(expired(cutoff, max_id), FlashcardPrediction.user_id.is_not(None))
+        .group_by(FlashcardPrediction.user_id, day, FlashcardPrediction.prediction)
+    )
+    stmt = _upsert_insert(db).from_select(["user_id", "day", "prediction", "count"], grouped)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "day", "prediction"],
+        set_={"count": PredictionDailyCount.count + stmt.excluded["count"]},
+    )
+    db.execute(stmt)
+
+
+def archive(db, cutoff, max_id, archive_dir):
+    """Streams expired raw rows to a gzipped JSON-lines file."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"flashcard_predictions_before_{cutoff:%Y%m%d}_{datetime.utcnow():%H%M%S}.jsonl.gz")
+    rows = db.execute(
+        select(FlashcardPrediction.id, FlashcardPrediction.user_id, FlashcardPrediction.prediction, FlashcardPrediction.timestamp)
+        .where(expired(cutoff, max_id))
+        .order_by(FlashcardPrediction.id)
+        .execution_options(yield_per=ARCHIVE_BATCH)
+    )
+    count = 0
+    with gzip.open(path, "wt") as f:
+        for row in rows:
+            f.write(json.dumps({
+                "id": row.id,
+                "user_id": row.user_id,
+                "prediction": row.prediction,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+            }) + "\n")
+            count += 1
+    return path, count
+
+
+def compact(retention_days=RETENTION_DAYS, archive_dir=ARCHIVE_DIR):
+    cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=retention_days), datetime.min.time())
+    db = SessionLocal()
+    try:
+        max_id = db.execute(
+            select(func.max(FlashcardPrediction.id)).where(FlashcardPrediction.timestamp < cutoff)
+        ).scalar()
+        if max_id is None:
+            print(f"✅ No predictions older than {cutoff:%Y-%m-%d}")
+            return 0
+        # Rollup, archive and delete happen in one transaction so a crash can't double count
+        rollup(db, cutoff, max_id)
+        if archive_dir:
+            path, archived = archive(db, cutoff, max_id, archive_dir)
+            print(f"📦 Archived {archived} rows to {path}")
+        deleted = db.execute(delete(FlashcardPrediction).where(expired(cutoff, max_id))).rowcount
+        db.commit()
+        print(f"✅ Rolled up and removed {deleted} predictions older than {cutoff:%Y-%m-%d}")
+        return deleted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    compact()
@@ -1,5 +1,7 @@
+from sqlalchemy import func, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from models import User
+from models import User, LatestPrediction
 from schemas import UserCreate
 from passlib.context import CryptContext
 from datetime import datetime
@@ -26,3 +28,34 @@ def get_user_by_email(db: Session, email: str):
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
+
+def set_latest_prediction(db: Session, user_id: int, prediction_id: int, prediction: str, timestamp: datetime):
+    """
+    Moves the user's latest-prediction pointer forward (older timestamps are ignored).
+    One upsert, so concurrent first predictions or a racing backfill can't collide. Doesn't commit.
+    """
+    insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+    stmt = insert(LatestPrediction).values(
+        user_id=user_id,
+        prediction_id=prediction_id,
+        prediction=prediction,
+        timestamp=timestamp,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "prediction_id": stmt.excluded.prediction_id,
+            "prediction": stmt.excluded.prediction,
+            "timestamp": stmt.excluded.timestamp,
+        },
+        where=or_(LatestPrediction.timestamp.is_(None), stmt.excluded.timestamp >= LatestPrediction.timestamp),
+    )
+    db.execute(stmt)
+
+def bump_user_data_version(db: Session, user_id: int):
+    """Increments the counter behind the user's ETags. Doesn't touch updated_at (that's the profile's)."""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=func.coalesce(User.data_version, 0) + 1, updated_at=User.updated_at)
+    )
@@ -1,5 +1,8 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import Index, create_engine, text
+from sqlalchemy.schema import CreateIndex
 from models import Base
+from gloss_index import GLOSS_KEY
+from activity import backfill as backfill_activity_counts
 from dotenv import load_dotenv
 import os
 load_dotenv()
@@ -21,4 +24,42 @@ with engine.connect() as conn:
         ALTER TABLE users
         ADD COLUMN IF NOT EXISTS total_predictions INTEGER DEFAULT 0;
     """))
+    conn.execute(text("""
+        ALTER TABLE users
+        ADD COLUMN IF NOT EXISTS data_version INTEGER NOT NULL DEFAULT 0;
+    """))
+    conn.execute(text("""
+        ALTER TABLE flashcards
+        ADD COLUMN IF NOT EXISTS catalog_version INTEGER;
+    """))
+    conn.execute(text("""
+        ALTER TABLE tags
+        ADD COLUMN IF NOT EXISTS catalog_version INTEGER;
+    """))
+    conn.execute(text("""
+        ALTER TABLE catalog_versions
+        ADD COLUMN IF NOT EXISTS delta_base INTEGER NOT NULL DEFAULT 0;
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_flashcards_catalog_version ON flashcards (catalog_version);
+    """))
+    # Replaced by ix_flashcards_gloss_norm, which also collapses whitespace like normalize_gloss
+    conn.execute(text("""
+        DROP INDEX IF EXISTS ix_flashcards_gloss_key;
+    """))
+    conn.execute(CreateIndex(Index("ix_flashcards_gloss_norm", GLOSS_KEY), if_not_exists=True))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_tags_catalog_version ON tags (catalog_version);
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_flashcard_predictions_user_timestamp
+        ON flashcard_predictions (user_id, timestamp);
+    """))
+    conn.commit()
     print("✅ Columns added.")
+
+    # One-off: build the analytics timeline counters from existing history
+    backfilled = backfill_activity_counts(conn)
+    conn.commit()
+    if backfilled:
+        print(f"✅ Backfilled {backfilled} activity counters.")
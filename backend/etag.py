@@ -0,0 +1,34 @@
+# etag.py
+# Conditional GET helpers. ETags are built from version counters (catalog version,
+# users.data_version), so a request can be answered with 304 before any heavy query runs.
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"  # clients may store responses but must revalidate
+
+
+def make_etag(*parts) -> str:
+    # Weak: the compression middleware may re-encode the same body
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against If-None-Match, as RFC 9110 prescribes for GET."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(t) for t in header.split(",")}
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -1,9 +1,10 @@
 import os
 import cv2
 import mediapipe as mp
-import numpy as np
 import csv
 
+from translator.landmark_arrays import normalized_hand
+
 mp_hands = mp.solutions.hands
 hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.7)
 mp_drawing = mp.solutions.drawing_utils
@@ -24,14 +25,6 @@ with open(output_csv, 'w', newline='') as f:
             results = hands.process(image_rgb)
 
             if results.multi_hand_landmarks:
-                landmarks = results.multi_hand_landmarks[0]
-                x = [lm.x for lm in landmarks.landmark]
-                y = [lm.y for lm in landmarks.landmark]
-                z = [lm.z for lm in landmarks.landmark]
-
-                # Normalize coordinates
-                x0, y0 = x[0], y[0]
-                x = [i - x0 for i in x]
-                y = [i - y0 for i in y]
-
-                writer.writerow(x + y + z + [label])
+                # Normalized coordinates, written as x0..x20, y0..y20, z0..z20
+                hand = normalized_hand(results.multi_hand_landmarks[0])
+                writer.writerow(hand.T.ravel().tolist() + [label])
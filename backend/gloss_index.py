@@ -0,0 +1,83 @@
+# gloss_index.py
+# In-memory gloss -> flashcard map used to turn a gloss sequence into a video playlist.
+import threading
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models import CatalogVersion, Flashcard
+
+IN_CHUNK = 1000
+MAX_CACHED_GLOSSES = 50000  # misses from free text are cached too, so keep the map bounded
+
+_lock = threading.Lock()
+_version = None
+_entries = {}  # normalized gloss -> (flashcard_id, video_url, stored gloss), or None when there is no card
+
+
+def normalize_gloss(gloss: str) -> str:
+    # WLASL glosses are stored lowercase; the glossizer emits e.g. "THANK YOU" / "GOOD-MORNING"
+    return " ".join(gloss.lower().replace("-", " ").split())
+
+
+def _collapse_spaces(expr):
+    """SQL for runs of whitespace -> one space, with replace() only so any dialect can index it."""
+    for whitespace in ("\t", "\n", "\r"):
+        expr = func.replace(expr, whitespace, " ")
+    # Every space becomes \x01\x02, the \x02\x01 between neighbours is dropped, the rest turns back into a space
+    return func.replace(func.replace(func.replace(expr, " ", "\x01\x02"), "\x02\x01", ""), "\x01\x02", " ")
+
+
+# normalize_gloss() of flashcards.gloss in SQL (db_init indexes this expression), so
+# stored glosses like "good-morning" or "thank  you" are keyed the same way as the queries
+GLOSS_KEY = func.lower(func.trim(_collapse_spaces(func.replace(Flashcard.gloss, "-", " "))))
+
+
+def _current_entries(db: Session):
+    """Returns the map for the current catalog version, dropping it when an import published a new one."""
+    global _version, _entries
+    version = db.execute(select(func.max(CatalogVersion.id))).scalar()
+    with _lock:
+        if version != _version or len(_entries) > MAX_CACHED_GLOSSES:
+            _version, _entries = version, {}
+        return _entries
+
+
+def _load(db: Session, keys):
+    """Best card per gloss for the given keys: lowest complexity, then the earliest imported."""
+    found = {}
+    for i in range(0, len(keys), IN_CHUNK):
+        rows = db.execute(
+            select(Flashcard.id, GLOSS_KEY, Flashcard.video_url, Flashcard.complexity, Flashcard.gloss)
+            .where(GLOSS_KEY.in_(keys[i:i + IN_CHUNK]))
+        )
+        for card_id, key, video_url, complexity, stored in rows:
+            rank = (complexity if complexity is not None else float("inf"), card_id)
+            best = found.get(key)
+            if best is None or rank < best[0]:
+                found[key] = (rank, (card_id, video_url, stored))
+    return {key: card for key, (_, card) in found.items()}
+
+
+def resolve_glosses(db: Session, glosses):
+    """
+    Resolves each gloss to its best flashcard video. Returns a list of
+    (gloss, flashcard_id, video_url, flashcard_gloss) in input order, where
+    flashcard_gloss is the gloss as stored on the card; all but gloss are None
+    when no flashcard exists. Only glosses not yet in the map hit the database,
+    all of them in one IN query.
+    """
+    entries = _current_entries(db)
+    keys = [normalize_gloss(g) for g in glosses]
+
+    missing = sorted({k for k in keys if k and k not in entries})
+    if missing:
+        loaded = _load(db, missing)
+        for key in missing:
+            entries[key] = loaded.get(key)  # None is cached as well
+
+    playlist = []
+    for gloss, key in zip(glosses, keys):
+        match = entries.get(key)
+        playlist.append((gloss, *match) if match else (gloss, None, None, None))
+    return playlist
@@ -1,144 +1,154 @@
 from database import SessionLocal, engine
-from models import Flashcard, Tag, Base
+from models import Flashcard, Base
+from catalog import publish_catalog_version
+import os
 import json
-import requests
-import re
+import hashlib
 from sqlalchemy.orm import Session
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from url_validator import validate_urls
+from bulk_loader import bulk_load_flashcards
+from wlasl_stream import iter_glosses
 
 # Create tables if they don't exist
 Base.metadata.create_all(bind=engine)
 
-# Load the dataset
-with open("WLASL_enhanced_with_complexity_tags.json", "r") as f:
-    data = json.load(f)
+DATASET_FILE = "WLASL_enhanced_with_complexity_tags.json"
+CHECKPOINT_PREFIX = "import_checkpoint"  # one <prefix>.<path hash>.json per dataset file
+# Gloss entries are streamed from the dataset and imported this many at a time
+entries_per_batch = int(os.getenv("IMPORT_ENTRIES_PER_BATCH", 500))
 
-db: Session = SessionLocal()
+# Concurrent URL checks (per host and in total)
+max_workers = 50
+per_host_limit = 8
 
-def is_url_valid(session, url):
-    """
-    Checks if a URL is reachable and valid using a HEAD request with fallback to GET.
-    """
-    try:
-        if not re.match(r'^https?://', url):
-            return False
 
-        response = session.head(url, allow_redirects=True, timeout=5)
-        if response.status_code == 200:
-            return True
+def dataset_fingerprint(path):
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
 
-        response = session.get(url, stream=True, timeout=5)
-        return response.status_code == 200
-    except requests.RequestException:
-        return False
 
-# Number of concurrent workers
-max_workers = 50
+def checkpoint_path(path):
+    """Checkpoint file of a dataset file, so imports of different files never share one."""
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return f"{CHECKPOINT_PREFIX}.{digest}.json"
 
-try:
-    # Fetch existing data
-    existing_urls = {url for (url,) in db.query(Flashcard.video_url).all()}
-    existing_tags = {t.name: t for t in db.query(Tag).all()}
 
-    seen_urls = set()
-    urls_to_check = []
-    url_to_flashcard_data = {}
+def load_checkpoint(path):
+    """Returns the saved progress if it belongs to the current dataset file, else None."""
+    if not os.path.exists(checkpoint_path(path)):
+        return None
+    with open(checkpoint_path(path), "r") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("dataset") != dataset_fingerprint(path):
+        print("⚠️ Dataset changed since the last checkpoint, starting over")
+        return None
+    return checkpoint
+
 
-    duplicate_count = 0
-    total_entries = len(data)
+def save_checkpoint(path, checkpoint):
+    target = checkpoint_path(path)
+    tmp_path = target + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, target)  # atomic, a crash never leaves half a checkpoint
 
-    for idx, entry in enumerate(data):
-        if idx % 500 == 0:
-            print(f"Processing entry {idx}/{total_entries}...")
 
+def import_batch(db, entries, stats):
+    """Validates and bulk loads the flashcards of a batch of gloss entries."""
+    candidates = {}
+    for entry in entries:
         gloss = entry.get("gloss")
         complexity = entry.get("complexity")
         tag_dict = entry.get("tags", {})
         tags = [v.strip() for v in tag_dict.values() if isinstance(v, str) and v.strip()]
-        instances = entry.get("instances", [])
 
-        for instance in instances:
+        for instance in entry.get("instances", []):
             video_url = instance.get("url")
             if not video_url:
                 continue
-
-            if video_url in existing_urls or video_url in seen_urls:
-                duplicate_count += 1
+            if video_url in candidates:
+                stats["duplicates"] += 1
                 continue
-
-            seen_urls.add(video_url)
-            urls_to_check.append(video_url)
-            url_to_flashcard_data[video_url] = {
+            candidates[video_url] = {
                 "gloss": gloss,
                 "video_url": video_url,
                 "complexity": complexity,
                 "tags": tags
             }
 
-    print(f"🔍 Checking {len(urls_to_check)} URLs for validity...")
-
-    session = requests.Session()
-    adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-
-    valid_urls = set()
-    invalid_count = 0
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(is_url_valid, session, url): url for url in urls_to_check}
-        for idx, future in enumerate(as_completed(futures), start=1):
-            url = futures[future]
-            try:
-                if future.result():
-                    valid_urls.add(url)
-                else:
-                    invalid_count += 1
-            except Exception:
-                invalid_count += 1
-
-            if idx % 1000 == 0:
-                print(f"🔎 Checked {idx}/{len(urls_to_check)} URLs so far...")
-
-    session.close()
-
-    # Insert valid flashcards and their tags
-    new_flashcards_count = 0
-    for url in valid_urls:
-        flashcard_data = url_to_flashcard_data[url]
-        flashcard = Flashcard(
-            gloss=flashcard_data["gloss"],
-            video_url=flashcard_data["video_url"],
-            complexity=flashcard_data["complexity"]
+    # Only this batch's URLs are looked up, so memory doesn't grow with the table
+    urls = list(candidates)
+    existing_urls = set()
+    for i in range(0, len(urls), 5000):
+        existing_urls.update(
+            url for (url,) in db.query(Flashcard.video_url).filter(Flashcard.video_url.in_(urls[i:i + 5000]))
         )
+    stats["duplicates"] += len(existing_urls)
+    urls_to_check = [url for url in urls if url not in existing_urls]
+    if not urls_to_check:
+        return
 
-        for tag_name in flashcard_data["tags"]:
-            tag_name = tag_name.strip()
-            if not tag_name:
-                continue
+    # Only URLs that are new or whose cached result expired hit the network
+    valid_urls = validate_urls(urls_to_check, max_connections=max_workers, per_host=per_host_limit)
+    stats["invalid"] += len(urls_to_check) - len(valid_urls)
+    stats["valid"] += len(valid_urls)
 
-            if tag_name not in existing_tags:
-                tag = Tag(name=tag_name)
-                db.add(tag)
-                db.flush()
-                existing_tags[tag_name] = tag
+    # Bulk insert valid flashcards, their tags and links in committed chunks
+    records = [candidates[url] for url in urls_to_check if url in valid_urls]
+    if records:
+        load_stats = bulk_load_flashcards(db, records)
+        stats["flashcards"] += load_stats["flashcards"]
+        stats["tags"] += load_stats["tags"]
+        stats["flashcard_tags"] += load_stats["flashcard_tags"]
 
-            flashcard.tags.append(existing_tags[tag_name])
 
-        db.add(flashcard)
-        new_flashcards_count += 1
+db: Session = SessionLocal()
 
-    db.commit()
+try:
+    checkpoint = load_checkpoint(DATASET_FILE) or {
+        "dataset": dataset_fingerprint(DATASET_FILE),
+        "offset": 0,
+        "entries": 0,
+        "stats": {"flashcards": 0, "tags": 0, "flashcard_tags": 0, "duplicates": 0, "invalid": 0, "valid": 0},
+    }
+    stats = checkpoint["stats"]
+    if checkpoint["offset"]:
+        print(f"↪️ Resuming after {checkpoint['entries']} entries (byte {checkpoint['offset']})")
+
+    batch = []
+    for entry, next_offset in iter_glosses(DATASET_FILE, checkpoint["offset"]):
+        batch.append(entry)
+        if len(batch) < entries_per_batch:
+            continue
+
+        import_batch(db, batch, stats)
+        checkpoint["entries"] += len(batch)
+        checkpoint["offset"] = next_offset
+        save_checkpoint(DATASET_FILE, checkpoint)
+        print(f"Processed {checkpoint['entries']} entries...")
+        batch = []
+
+    if batch:
+        import_batch(db, batch, stats)
+        checkpoint["entries"] += len(batch)
+
+    # Publish a new catalog snapshot version for offline clients
+    catalog_version = publish_catalog_version(db)
+    if os.path.exists(checkpoint_path(DATASET_FILE)):
+        os.remove(checkpoint_path(DATASET_FILE))
 
     print(f"✅ Import completed:")
-    print(f"   ➕ {new_flashcards_count} new flashcards added")
-    print(f"   🔁 {duplicate_count} duplicates skipped")
-    print(f"   ❌ {invalid_count} invalid URLs skipped")
-    print(f"   📦 Total valid URLs processed: {len(valid_urls)}")
+    print(f"   ➕ {stats['flashcards']} new flashcards added")
+    print(f"   🔁 {stats['duplicates']} duplicates skipped")
+    print(f"   ❌ {stats['invalid']} invalid URLs skipped")
+    print(f"   📦 Total valid URLs processed: {stats['valid']}")
+    print(f"   🏷️ {stats['tags']} new tags, {stats['flashcard_tags']} tag links")
+    print(f"   🗂️ Catalog version {catalog_version.id} published")
 
 except Exception as e:
     db.rollback()
     print(f"❌ Error during import: {str(e)}")
+    print(f"   Progress is saved in {checkpoint_path(DATASET_FILE)}, re-run to resume")
     import traceback
     traceback.print_exc()
 
@@ -4,6 +4,8 @@ import mediapipe as mp
 import tensorflow as tf
 import joblib
 
+from translator.landmark_arrays import normalized_hand
+
 # Load model and label encoder
 model = tf.keras.models.load_model("cnn_lstm_landmark_model.h5")
 le = joblib.load("label_encoder.pkl")
@@ -13,18 +15,6 @@ mp_hands = mp.solutions.hands
 hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.7)
 mp_drawing = mp.solutions.drawing_utils
 
-def preprocess_landmarks(landmarks):
-    x = [lm.x for lm in landmarks]
-    y = [lm.y for lm in landmarks]
-    z = [lm.z for lm in landmarks]
-
-    # Normalize using wrist as origin
-    x0, y0 = x[0], y[0]
-    x = [i - x0 for i in x]
-    y = [i - y0 for i in y]
-
-    return np.array(list(zip(x, y, z)), dtype=np.float32).reshape(1, 21, 3)
-
 # Webcam loop
 cap = cv2.VideoCapture(0)
 
@@ -41,7 +31,7 @@ while True:
             mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
             # Preprocess and predict
-            input_data = preprocess_landmarks(hand_landmarks.landmark)
+            input_data = normalized_hand(hand_landmarks).reshape(1, 21, 3)
             prediction = model.predict(input_data)
             class_id = np.argmax(prediction)
             class_label = le.inverse_transform([class_id])[0]
@@ -1,9 +1,12 @@
 import os
-import json
+import sys
 import subprocess
 import random
 import time
 import logging
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wlasl_stream import iter_instances
 
 # Configure logging
 logging.basicConfig(filename='download_{}.log'.format(int(time.time())), filemode='w', level=logging.DEBUG)
@@ -79,30 +82,24 @@ def select_download_method(url):
 
 def download_nonyt_videos(indexfile, saveto='raw_videos'):
     """Download non-YouTube videos."""
-    with open(indexfile) as f:
-        content = json.load(f)
-
     if not os.path.exists(saveto):
         os.makedirs(saveto)
 
-    for entry in content:
+    for entry, inst in iter_instances(indexfile):
         gloss = entry['gloss']
-        instances = entry['instances']
+        video_url = inst['url']
+        video_id = inst['video_id']
+        logging.info(f'gloss: {gloss}, video: {video_id}')
+        download_method = select_download_method(video_url)
 
-        for inst in instances:
-            video_url = inst['url']
-            video_id = inst['video_id']
-            logging.info(f'gloss: {gloss}, video: {video_id}')
-            download_method = select_download_method(video_url)
+        if download_method == run_yt_dlp:
+            logging.warning(f'Skipping YouTube video {video_id}')
+            continue
 
-            if download_method == run_yt_dlp:
-                logging.warning(f'Skipping YouTube video {video_id}')
-                continue
-
-            try:
-                download_method(video_url, saveto, video_id)
-            except Exception as e:
-                logging.error(f'Failed to download video {video_id}: {e}')
+        try:
+            download_method(video_url, saveto, video_id)
+        except Exception as e:
+            logging.error(f'Failed to download video {video_id}: {e}')
 
 def check_youtube_dl_version():
     """Check if yt-dlp is installed and get the version."""
@@ -111,33 +108,27 @@ def check_youtube_dl_version():
 
 def download_yt_videos(indexfile, saveto='raw_videos'):
     """Download YouTube videos using yt-dlp."""
-    with open(indexfile) as f:
-        content = json.load(f)
-
     if not os.path.exists(saveto):
         os.makedirs(saveto)
 
-    for entry in content:
+    for entry, inst in iter_instances(indexfile):
         gloss = entry['gloss']
-        instances = entry['instances']
-
-        for inst in instances:
-            video_url = inst['url']
-            video_id = inst['video_id']
-
-            if 'youtube' not in video_url and 'youtu.be' not in video_url:
-                continue
-
-            download_path = os.path.join(saveto, f'{video_id}.mp4')
-            if os.path.exists(download_path):
-                logging.info(f'Video {video_id} already downloaded.')
-                continue
-
-            if run_yt_dlp(video_url, saveto):
-                logging.info(f"Downloaded YouTube video: {video_id}")
-            else:
-                logging.error(f"Failed to download YouTube video: {video_id}")
-            time.sleep(random.uniform(1.0, 1.5))
+        video_url = inst['url']
+        video_id = inst['video_id']
+
+        if 'youtube' not in video_url and 'youtu.be' not in video_url:
+            continue
+
+        download_path = os.path.join(saveto, f'{video_id}.mp4')
+        if os.path.exists(download_path):
+            logging.info(f'Video {video_id} already downloaded.')
+            continue
+
+        if run_yt_dlp(video_url, saveto):
+            logging.info(f"Downloaded YouTube video: {video_id}")
+        else:
+            logging.error(f"Failed to download YouTube video: {video_id}")
+        time.sleep(random.uniform(1.0, 1.5))
 
 def main():
     # Download non-YouTube videos first
@@ -1,27 +1,25 @@
-import json
 import csv
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wlasl_stream import iter_instances
 
 WLASL_JSON = 'WLASL_v0.3.json'
 VIDEO_DIR = 'raw_videos'
 OUTPUT_CSV = 'dataset_index.csv'
 
-with open(WLASL_JSON, 'r') as f:
-    data = json.load(f)
-
-rows = []
-
-for entry in data:
-    label = entry['gloss']
-    for inst in entry['instances']:
-        video_id = inst['video_id']
-        video_path = os.path.join(VIDEO_DIR, f'{video_id}.mp4')
-        if os.path.exists(video_path):
-            rows.append({'video_path': video_path, 'label': label})
+count = 0
 
+# Rows are written as the annotation file is streamed, nothing is held in memory
 with open(OUTPUT_CSV, 'w', newline='') as f:
     writer = csv.DictWriter(f, fieldnames=['video_path', 'label'])
     writer.writeheader()
-    writer.writerows(rows)
+    for entry, inst in iter_instances(WLASL_JSON):
+        video_id = inst['video_id']
+        video_path = os.path.join(VIDEO_DIR, f'{video_id}.mp4')
+        if os.path.exists(video_path):
+            writer.writerow({'video_path': video_path, 'label': entry['gloss']})
+            count += 1
 
-print(f"Saved {len(rows)} entries to {OUTPUT_CSV}")
+print(f"Saved {count} entries to {OUTPUT_CSV}")
@@ -2,12 +2,12 @@ import torch
 import cv2
 import torchvision.transforms as transforms
 from model import CNNLSTM
-import requests
+import os
 import threading
 import queue
-import time
+from prediction_sender import PredictionSender
 
-API_ENDPOINT = "http://localhost:8000/users/api/flashcards/predict"
+API_ENDPOINT = "http://localhost:8000/users/api/flashcards/predict/batch"
 
 model = CNNLSTM(num_classes=247)
 model.load_state_dict(torch.load("asl_model.pth", map_location='cpu'))
@@ -21,13 +21,8 @@ transform = transforms.Compose([
     transforms.Normalize([0.5] * 3, [0.5] * 3)
 ])
 
-def send_prediction_to_api(label):
-    data = {"prediction": label}
-    try:
-        response = requests.post(API_ENDPOINT, json=data)
-        print(f"✅ Sent prediction '{label}' | Response:", response.status_code)
-    except Exception as e:
-        print("❌ Failed to send prediction:", e)
+# Predictions are batched and sent from a background thread
+sender = PredictionSender(API_ENDPOINT, token=os.getenv("API_TOKEN"))
 
 # Thread-safe queue to send frames from main thread to worker
 frame_queue = queue.Queue(maxsize=32)
@@ -48,7 +43,7 @@ def inference_worker():
                     _, pred = torch.max(outputs, 1)
                     label = label_map[pred.item()]
                     print("🧠 Prediction:", label)
-                    send_prediction_to_api(label)
+                    sender.submit(label)
                 frames_buffer = []
 
             frame_queue.task_done()
@@ -85,3 +80,4 @@ while True:
 
 cap.release()
 cv2.destroyAllWindows()
+sender.close()
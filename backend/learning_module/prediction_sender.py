@@ -0,0 +1,122 @@
+import threading
+from collections import deque
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PredictionSender:
+    """
+    Ships predictions to the batch endpoint from a background thread.
+
+    submit() only appends to a bounded in-memory queue, so the inference
+    thread never waits on the network. The sender thread flushes a batch when
+    `batch_size` predictions are queued or `flush_interval` seconds have passed,
+    reusing one keep-alive connection. Failed batches are put back at the front
+    of the queue and retried with exponential backoff; when the queue is full
+    the oldest predictions are dropped.
+    """
+
+    def __init__(
+        self,
+        endpoint,
+        token=None,
+        batch_size=50,
+        flush_interval=1.0,
+        max_queue=5000,
+        timeout=5,
+        max_backoff=30.0,
+    ):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+
+        self.queue = deque(maxlen=max_queue)
+        self.dropped = 0
+        self.sent = 0
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, label):
+        item = {"prediction": label, "timestamp": datetime.utcnow().isoformat()}
+        with self._lock:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1  # deque drops the oldest entry for us
+            self.queue.append(item)
+            ready = len(self.queue) >= self.batch_size
+        if ready:
+            self._wakeup.set()
+
+    def close(self, timeout=5):
+        """Flush what is left and stop the sender thread."""
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self.session.close()
+
+    def _take_batch(self):
+        with self._lock:
+            count = min(self.batch_size, len(self.queue))
+            return [self.queue.popleft() for _ in range(count)]
+
+    def _requeue(self, batch):
+        with self._lock:
+            # Put the failed batch back in front, keeping the newest entries if full
+            free = self.queue.maxlen - len(self.queue)
+            if free < len(batch):
+                self.dropped += len(batch) - free
+                batch = batch[len(batch) - free:]
+            self.queue.extendleft(reversed(batch))
+
+    def _post(self, batch):
+        try:
+            response = self.session.post(self.endpoint, json={"predictions": batch}, timeout=self.timeout)
+        except requests.RequestException as e:
+            print("❌ Failed to send predictions:", e)
+            return False
+        if response.status_code >= 500 or response.status_code == 429:
+            print("❌ Server rejected predictions:", response.status_code)
+            return False
+        if response.status_code >= 400:
+            # Client errors won't succeed on retry, drop the batch
+            print("❌ Dropping prediction batch:", response.status_code, response.text[:200])
+            with self._lock:
+                self.dropped += len(batch)
+            return True
+        with self._lock:
+            self.sent += len(batch)
+        return True
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            while self.queue:
+                batch = self._take_batch()
+                if self._post(batch):
+                    backoff = 0.0
+                    continue
+                self._requeue(batch)
+                if self._stop.is_set():
+                    return  # one last attempt on shutdown, then give up
+                backoff = min(self.max_backoff, max(0.5, backoff * 2))
+                self._stop.wait(backoff)
+
+            if self._stop.is_set():
+                return
@@ -14,21 +14,41 @@ from pydantic import BaseModel, Field
 from typing import List
 from dotenv import load_dotenv
 from fastapi.staticfiles import StaticFiles
+from responses import FastJSONResponse, CompressionMiddleware
+from fastapi.responses import PlainTextResponse
+from admission import AdmissionControlMiddleware, parse_limits
+import metrics
 import os
+from video_stitcher import stitch_cache
+from catalog import prewarm_cache
+from database import SessionLocal
 
 load_dotenv()
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Register routers
 app.include_router(users.router)
 app.include_router(learn.router)
-# CORS setup
+# Load shedding: "prefix=max_concurrent:max_queue:queue_timeout_seconds;..."
+app.add_middleware(
+    AdmissionControlMiddleware,
+    limits=parse_limits(os.getenv(
+        "ADMISSION_LIMITS",
+        "/predict=4:16:5;/learn/api/user/analytics=8:32:5"
+    ))
+)
+# CORS setup (added after admission control so 503s still carry CORS headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True,
     allow_methods=["*"], allow_headers=["*"]
 )
+# gzip/brotli for large JSON payloads (analytics, flashcard pages)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+)
 os.makedirs("static/uploads", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -37,6 +57,26 @@ model = joblib.load("label_encoder.pkl")
 mp_hands = mp.solutions.hands
 hands = mp_hands.Hands(static_image_mode=True, max_num_hands=1)
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return metrics.render()
+
+@app.on_event("startup")
+def prewarm_catalog_cache():
+    db = SessionLocal()
+    try:
+        levels = prewarm_cache(db)
+        print(f"🔥 Cache pre-warmed: first page of {len(levels)} flashcard levels and the tag list")
+    except Exception as e:
+        # A cold cache only costs latency, don't block startup on it
+        print(f"⚠️ Cache pre-warm skipped: {e}")
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def stop_video_renderers():
+    stitch_cache.shutdown()
+
 # Input schema
 class LandmarkInput(BaseModel):
     landmarks: list[float]
@@ -54,7 +94,7 @@ class AnalyticsResponse(BaseModel):
 
 # ASL Prediction endpoint (secured)
 @app.post("/predict")
-async def predict(
+def predict(
     data: LandmarkInput,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
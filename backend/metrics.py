@@ -0,0 +1,57 @@
+# metrics.py
+# Minimal in-process metrics registry rendered in the Prometheus text format at /metrics.
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_values = defaultdict(float)  # (name, labels) -> value
+_meta = {}  # name -> (type, help)
+
+
+def describe(name: str, kind: str, help_text: str):
+    """kind is 'counter' or 'gauge'."""
+    _meta[name] = (kind, help_text)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    with _lock:
+        _values[_key(name, labels)] += value
+
+
+def set_gauge(name: str, value: float, **labels):
+    with _lock:
+        _values[_key(name, labels)] = value
+
+
+def get(name: str, **labels) -> float:
+    return _values.get(_key(name, labels), 0.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{k}="{v}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def render() -> str:
+    with _lock:
+        snapshot = sorted(_values.items())
+
+    lines = []
+    described = set()
+    for (name, labels), value in snapshot:
+        if name not in described and name in _meta:
+            kind, help_text = _meta[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            described.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, UniqueConstraint, Date, Table, func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, UniqueConstraint, Date, Table, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -38,6 +38,7 @@ class Tag(Base):
     __tablename__ = "tags"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
+    catalog_version = Column(Integer, index=True, nullable=True)  # set when a catalog version is published
 
     flashcards = relationship("Flashcard", secondary=tag_association_table, back_populates="tags")
     learned_flashcards = relationship("LearnedFlashcard", secondary=learned_flashcard_tag_association, back_populates="tags")
@@ -60,6 +61,7 @@ class User(Base):
     total_learning_minutes = Column(Integer, default=0)
     total_translations = Column(Integer, default=0)
     total_predictions = Column(Integer, default=0)
+    data_version = Column(Integer, default=0, nullable=False, server_default="0")  # bumped on every learning-data write, used in ETags
 
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
@@ -83,7 +85,36 @@ class FlashcardPrediction(Base):
     prediction = Column(String, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_flashcard_predictions_user_timestamp", "user_id", "timestamp"),)
+
     user = relationship("User", back_populates="predictions")
+
+class LatestPrediction(Base):
+    # One row per user, updated on every insert so the GET endpoint never scans history
+    __tablename__ = "latest_predictions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    prediction_id = Column(Integer)
+    prediction = Column(String, nullable=False)
+    timestamp = Column(DateTime)
+
+class PredictionDailyCount(Base):
+    # Raw predictions older than the retention window are rolled up into this table
+    __tablename__ = "prediction_daily_counts"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    prediction = Column(String, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+class UserActivityCount(Base):
+    # Per-day activity counters behind the analytics timeline, kept up to date by the write endpoints
+    __tablename__ = "user_activity_counts"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    type = Column(String, primary_key=True)  # learned, daily_practice, incorrect, quiz, reminder
+    count = Column(Integer, default=0, nullable=False)
     
 
 
@@ -94,10 +125,23 @@ class Flashcard(Base):
     gloss = Column(String, index=True)
     video_url = Column(String)
     complexity = Column(Integer)
+    catalog_version = Column(Integer, index=True, nullable=True)  # set when a catalog version is published
 
     feedback = relationship("FlashcardFeedback", back_populates="flashcard")
     daily_practices = relationship("DailyPractice", back_populates="flashcard", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary=tag_association_table, back_populates="flashcards")
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    id = Column(Integer, primary_key=True)  # the version number clients sync against
+    etag = Column(String, nullable=False)
+    flashcard_count = Column(Integer, default=0)
+    tag_count = Column(Integer, default=0)
+    # Deltas only add rows: clients on a version before this one get a full snapshot
+    delta_base = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class QuizResult(Base):
     __tablename__ = "quiz_results"
 
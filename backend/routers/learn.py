@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func, Integer, Float, cast, case, literal_column
 from database import get_db
 from models import (
@@ -20,19 +21,42 @@ from models import (
     
 )
 from auth import get_current_user
+from responses import FastJSONResponse
+from catalog import get_current_version, get_snapshot, snapshot_etag, publish_catalog_version, get_level_page, get_tag_list, current_version_id
+from crud import bump_user_data_version
+from activity import record_activity, record_deleted, get_timeline
+from etag import make_etag, etag_matches, etag_headers, not_modified
+from cache import user_cache
+from gloss_index import resolve_glosses
+from video_stitcher import sequence_key, stitch_cache
+from fastapi.responses import FileResponse
+from translator.gloss_engine import glossize
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timedelta
 import random
-from sqlalchemy import union_all, literal
 
 router = APIRouter(prefix="/learn", tags=["Learn"])
 
 
+def _user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def _user_data_changed(db: Session, user_id: int):
+    """
+    Call after committing any write to a user's learning data: bumps the
+    user's data_version (so their ETags change) and drops cached per-user results.
+    """
+    bump_user_data_version(db, user_id)
+    db.commit()
+    user_cache.invalidate_tags(_user_tag(user_id))
+
+
 # ------------------ FLASHCARDS ------------------
 
 @router.get("/api/flashcards/level/{level}")
 def get_flashcards_by_level(
+    request: Request,
     level: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -40,32 +64,142 @@ def get_flashcards_by_level(
     limit: int = Query(12),
     only_unlearned: bool = Query(False)
 ):
+    # Changes only with the catalog or the user's learned set
+    etag = make_etag("flashcards", current_version_id(db), current_user.data_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     offset = (page - 1) * limit
     learned_ids = db.query(LearnedFlashcard.flashcard_id).filter_by(user_id=current_user.id).all()
     learned_set = {row[0] for row in learned_ids}
 
-    query = db.query(Flashcard).filter(Flashcard.complexity == level)
-    if only_unlearned:
-        query = query.filter(~Flashcard.id.in_(learned_set))
+    # Pages of the level are shared between users/workers; only the learned flags are per user
+    page_cards = get_level_page(db, level, offset, limit, exclude_ids=learned_set if only_unlearned else ())
 
-    total_count = query.count()
-    flashcards = query.offset(offset).limit(limit).all()
-
-    return {
-        "total": total_count,
+    return FastJSONResponse({
+        "total": page_cards["total"],
         "flashcards": [
             {
-                "id": f.id,
-                "gloss": f.gloss,
-                "video_url": f.video_url,
-                "learned": f.id in learned_set,
-                "tags": [tag.name for tag in f.tags],
-                "complexity": f.complexity
+                "id": c["id"],
+                "gloss": c["gloss"],
+                "video_url": c["video_url"],
+                "learned": c["id"] in learned_set,
+                "tags": c["tags"],
+                "complexity": c["complexity"]
             }
-            for f in flashcards
+            for c in page_cards["cards"]
         ]
+    }, headers=etag_headers(etag))
+
+@router.get("/api/tags")
+def get_tags(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return FastJSONResponse(get_tag_list(db))
+
+# ------------------ CATALOG ------------------
+
+@router.get("/api/catalog")
+def get_catalog_snapshot(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    since: int = Query(0)
+):
+    version = get_current_version(db)
+    if version is None:
+        # First request on a fresh database: publish what is already imported
+        try:
+            version = publish_catalog_version(db)
+        except IntegrityError:
+            db.rollback()
+            version = get_current_version(db)
+
+    etag = snapshot_etag(version, since)
+    headers = {**etag_headers(etag), "X-Catalog-Version": str(version.id)}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    _, body = get_snapshot(db, version, since)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# ------------------ GLOSS PLAYLIST ------------------
+
+MAX_PLAYLIST_GLOSSES = 500
+
+MAX_STITCHED_GLOSSES = 50
+
+class GlossPlaylistRequest(BaseModel):
+    glosses: Optional[List[str]] = None
+    text: Optional[str] = None
+
+def _requested_glosses(payload: GlossPlaylistRequest, limit: int = MAX_PLAYLIST_GLOSSES):
+    if payload.glosses is not None:
+        glosses = payload.glosses
+    elif payload.text is not None:
+        glosses = glossize(payload.text)
+    else:
+        raise HTTPException(status_code=422, detail="Provide either 'glosses' or 'text'")
+
+    if len(glosses) > limit:
+        raise HTTPException(status_code=413, detail=f"At most {limit} glosses per request")
+    return glosses
+
+@router.post("/api/gloss/playlist")
+def get_gloss_playlist(
+    payload: GlossPlaylistRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Resolves a gloss sequence (or raw text, glossized first) to one video per gloss."""
+    glosses = _requested_glosses(payload)
+    playlist = resolve_glosses(db, glosses)
+    return {
+        "glosses": glosses,
+        "playlist": [
+            {"gloss": gloss, "flashcard_id": flashcard_id, "video_url": video_url}
+            for gloss, flashcard_id, video_url, _ in playlist
+        ],
+        "missing": [gloss for gloss, flashcard_id, _, _ in playlist if flashcard_id is None],
     }
 
+@router.post("/api/gloss/video")
+def render_gloss_video(
+    payload: GlossPlaylistRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stitches the flashcard clips of a gloss sequence into one video. Returns 200
+    with the download URL when it is cached, 202 while it renders in the background.
+    """
+    glosses = _requested_glosses(payload, MAX_STITCHED_GLOSSES)
+    resolved = [match for match in resolve_glosses(db, glosses) if match[2]]
+    if not resolved:
+        raise HTTPException(status_code=404, detail="No videos found for these glosses")
+
+    # Keyed and fetched by the matched flashcard, so spellings of the same gloss share one render
+    clips = [(flashcard_id, flashcard_gloss, video_url) for _, flashcard_id, video_url, flashcard_gloss in resolved]
+    key = sequence_key(clips)
+    status = stitch_cache.submit(key, clips)
+    if status == "failed":
+        raise HTTPException(status_code=502, detail=f"Rendering failed: {stitch_cache.error(key)}")
+    if status != "ready":
+        response.status_code = 202
+    return {"key": key, "status": status, "glosses": [match[0] for match in resolved], "url": f"/learn/api/gloss/video/{key}"}
+
+@router.get("/api/gloss/video/{key}")
+def get_gloss_video(key: str):
+    # Unauthenticated so it can be used directly as a <video> src; keys are content hashes
+    if len(key) != 32 or any(c not in "0123456789abcdef" for c in key):
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    path = stitch_cache.get(key)
+    if path is None:
+        if stitch_cache.status(key) == "rendering":
+            return Response(status_code=202, headers={"Retry-After": "2"})
+        raise HTTPException(status_code=404, detail="Video not found")
+    return FileResponse(path, media_type="video/mp4", headers={"Cache-Control": "public, max-age=86400, immutable"})
+
 # ------------------ QUIZ ------------------
 
 @router.get("/api/quiz/level/{level}")
@@ -115,6 +249,7 @@ def submit_quiz(
     correct_count = sum(1 for ans in submission.answers if ans.get("correct"))
     score = int((correct_count / len(submission.answers)) * 100)
     passed = score >= 70
+    now = datetime.utcnow()
 
     result = QuizResult(
         user_id=current_user.id,
@@ -122,9 +257,11 @@ def submit_quiz(
         score=score,
         total_questions=len(submission.answers),
         correct_answers=correct_count,
-        passed=passed
+        passed=passed,
+        created_at=now
     )
     db.add(result)
+    record_activity(db, current_user.id, "quiz", now)
     db.commit()
     db.refresh(result)
 
@@ -146,6 +283,9 @@ def submit_quiz(
         progress.current_level = submission.level + 1
 
     db.add(progress)
+    wrong_count = len(submission.answers) - correct_count
+    if wrong_count:
+        record_activity(db, current_user.id, "incorrect", now, wrong_count)
     db.commit()
 
     for ans in submission.answers:
@@ -154,10 +294,12 @@ def submit_quiz(
                 user_id=current_user.id,
                 flashcard_gloss=ans["question"],
                 selected_answer=ans["selected"],
-                correct_answer=ans["question"]
+                correct_answer=ans["question"],
+                created_at=now
             )
             db.add(wrong)
             db.commit()
+    _user_data_changed(db, current_user.id)
 
     return {
         "message": "Quiz submitted successfully",
@@ -171,9 +313,16 @@ def submit_quiz(
 
 @router.get("/api/user/progress")
 def get_user_progress(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    etag = make_etag("progress", current_user.data_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
+
     progress = db.query(UserProgress).filter_by(user_id=current_user.id).first()
 
     if not progress:
@@ -199,18 +348,26 @@ def mark_flashcard_learned(
 ):
     existing = db.query(LearnedFlashcard).filter_by(user_id=current_user.id, flashcard_id=flashcard_id).first()
     if existing:
+        if existing.learned_at:
+            record_activity(db, current_user.id, "learned", existing.learned_at, -1)
         db.delete(existing)
         db.commit()
+        _user_data_changed(db, current_user.id)
         return {"status": "removed"}
-    new_record = LearnedFlashcard(user_id=current_user.id, flashcard_id=flashcard_id)
+    now = datetime.utcnow()
+    new_record = LearnedFlashcard(user_id=current_user.id, flashcard_id=flashcard_id, learned_at=now)
     db.add(new_record)
+    record_activity(db, current_user.id, "learned", now)
     db.commit()
+    _user_data_changed(db, current_user.id)
     return {"status": "learned"}
 
 @router.post("/api/flashcards/reset")
 def reset_learned_flashcards(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    record_deleted(db, current_user.id, "learned", LearnedFlashcard.learned_at.is_not(None))
     db.query(LearnedFlashcard).filter(LearnedFlashcard.user_id == current_user.id).delete()
     db.commit()
+    _user_data_changed(db, current_user.id)
     return {"message": "All learned flashcards reset."}
 
 @router.get("/api/quiz/incorrect")
@@ -226,7 +383,7 @@ def get_user_incorrect_answers(
         .all()
     )
 
-    return [{
+    return FastJSONResponse([{
         "flashcard_id": fc.id,
         "gloss": fc.gloss,
         "video_url": fc.video_url,
@@ -234,11 +391,13 @@ def get_user_incorrect_answers(
         "selected_answer": incorrect.selected_answer,  # Added this
         "correct_answer": incorrect.correct_answer,    # Added this
         "timestamp": incorrect.created_at              # Changed from incorrect_at to timestamp
-    } for incorrect, fc in incorrect_answers]
+    } for incorrect, fc in incorrect_answers])
 @router.delete("/api/quiz/incorrect/clear")
 def clear_incorrect_answers(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    record_deleted(db, current_user.id, "incorrect", IncorrectAnswer.created_at.is_not(None))
     deleted_count = db.query(IncorrectAnswer).filter(IncorrectAnswer.user_id == current_user.id).delete()
     db.commit()
+    _user_data_changed(db, current_user.id)
     return {"message": f"Cleared {deleted_count} incorrect answer(s)."}
 
 
@@ -260,10 +419,12 @@ def feedback_flashcard(
         if entry.liked == feedback.liked:
             db.delete(entry)
             db.commit()
+            _user_data_changed(db, current_user.id)
             return {"status": "feedback removed"}
         else:
             entry.liked = feedback.liked
             db.commit()
+            _user_data_changed(db, current_user.id)
             return {"status": "feedback updated"}
     else:
         entry = FlashcardFeedback(
@@ -273,15 +434,28 @@ def feedback_flashcard(
         )
         db.add(entry)
         db.commit()
+        _user_data_changed(db, current_user.id)
         return {"status": "feedback created"}
 
 # ------------------ USER ANALYTICS ------------------
 
+ANALYTICS_CACHE_TTL = 300  # seconds; the timeline window moves with the date
+
 @router.get("/api/user/analytics")
 def get_user_analytics(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    analytics = user_cache.get_or_set(
+        f"analytics:{current_user.id}",
+        lambda: _compute_user_analytics(db, current_user),
+        ANALYTICS_CACHE_TTL,
+        tags=(_user_tag(current_user.id),),
+    )
+    # Returned directly so FastAPI skips jsonable_encoder on this large payload
+    return FastJSONResponse(analytics)
+
+def _compute_user_analytics(db: Session, current_user: User):
     user_id = current_user.id
 
     # Last 10 quiz scores
@@ -423,89 +597,8 @@ def get_user_analytics(
     end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=30)
 
-    learned_subq = (
-        db.query(
-            func.date(LearnedFlashcard.learned_at).label("date"),
-            literal("learned").label("type"),
-            func.count(LearnedFlashcard.id).label("count")
-        )
-        .filter(
-            LearnedFlashcard.user_id == user_id,
-            func.date(LearnedFlashcard.learned_at) >= start_date
-        )
-        .group_by(func.date(LearnedFlashcard.learned_at))
-    )
-
-    practice_subq = (
-        db.query(
-            DailyPractice.practice_date.label("date"),
-            literal("daily_practice").label("type"),
-            func.count(DailyPractice.id).label("count")
-        )
-        .filter(
-            DailyPractice.user_id == user_id,
-            DailyPractice.practice_date >= start_date
-        )
-        .group_by(DailyPractice.practice_date)
-    )
-
-    incorrect_subq = (
-        db.query(
-            func.date(IncorrectAnswer.created_at).label("date"),
-            literal("incorrect").label("type"),
-            func.count(IncorrectAnswer.id).label("count")
-        )
-        .filter(
-            IncorrectAnswer.user_id == user_id,
-            func.date(IncorrectAnswer.created_at) >= start_date
-        )
-        .group_by(func.date(IncorrectAnswer.created_at))
-    )
-
-    quiz_subq = (
-        db.query(
-            func.date(QuizResult.created_at).label("date"),
-            literal("quiz").label("type"),
-            func.count(QuizResult.id).label("count")
-        )
-        .filter(
-            QuizResult.user_id == user_id,
-            func.date(QuizResult.created_at) >= start_date
-        )
-        .group_by(func.date(QuizResult.created_at))
-    )
-
-    reminder_subq = (
-        db.query(
-            func.date(Reminder.remind_at).label("date"),
-            literal("reminder").label("type"),
-            func.count(Reminder.id).label("count")
-        )
-        .filter(
-            Reminder.user_id == user_id,
-            func.date(Reminder.remind_at) >= start_date
-        )
-        .group_by(func.date(Reminder.remind_at))
-    )
-
-    union_query = union_all(
-        learned_subq,
-        practice_subq,
-        incorrect_subq,
-        quiz_subq,
-        reminder_subq
-    ).alias("combined")
-
-    progress_timeline = (
-        db.query(
-            union_query.c.date,
-            union_query.c.type,
-            func.sum(union_query.c.count).label("activity_count")
-        )
-        .group_by(union_query.c.date, union_query.c.type)
-        .order_by(union_query.c.date)
-        .all()
-    )
+    # One range scan over the per-day counters the write endpoints maintain
+    progress_timeline = get_timeline(db, user_id, start_date)
 
     return {
         "quiz_scores": [{"date": date.isoformat(), "score": score} for date, score in quiz_scores],
@@ -571,13 +664,26 @@ def create_reminder(reminder: ReminderCreate, db: Session = Depends(get_db), cur
         sent=False
     )
     db.add(new_reminder)
+    record_activity(db, current_user.id, "reminder", reminder.remind_at)
     db.commit()
     db.refresh(new_reminder)
+    _user_data_changed(db, current_user.id)
     return {"message": "Reminder created", "reminder_id": new_reminder.id}
 
 @router.get("/api/reminders/upcoming")
-def get_upcoming_reminders(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_upcoming_reminders(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     now = datetime.utcnow()
+    # "Upcoming" also changes as time passes, so the tag includes the current minute
+    etag = make_etag("reminders", current_user.data_version, now.strftime("%Y%m%d%H%M"))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
+
     reminders = (
         db.query(Reminder)
         .filter(Reminder.user_id == current_user.id, Reminder.remind_at >= now, Reminder.sent == False)
@@ -600,6 +706,7 @@ def mark_reminder_sent(reminder_id: int, db: Session = Depends(get_db), current_
         raise HTTPException(status_code=404, detail="Reminder not found")
     reminder.sent = True
     db.commit()
+    _user_data_changed(db, current_user.id)
     return {"message": "Reminder marked as sent"}
 
 
@@ -623,7 +730,9 @@ def get_daily_practice(db: Session = Depends(get_db), current_user: User = Depen
         for fc in selected_flashcards:
             dp = DailyPractice(user_id=current_user.id, flashcard_id=fc.id, practice_date=today, completed=False)
             db.add(dp)
+        record_activity(db, current_user.id, "daily_practice", today, len(selected_flashcards))
         db.commit()
+        _user_data_changed(db, current_user.id)
         daily_practice_entries = db.query(DailyPractice).filter_by(user_id=current_user.id, practice_date=today).all()
 
     results = []
@@ -662,6 +771,7 @@ def toggle_complete_daily_practice(
 
     dp_entry.completed = entry.completed
     db.commit()
+    _user_data_changed(db, current_user.id)
     return {"message": f"Practice marked as {'completed' if entry.completed else 'incomplete'}"}
 
 
@@ -669,11 +779,19 @@ def toggle_complete_daily_practice(
 
 @router.get("/api/dictionary/search")
 def search_dictionary(
+    request: Request,
+    response: Response,
     query: str = Query(..., min_length=1),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     limit: int = Query(10)
 ):
+    # Results depend only on the catalog (the query string is part of the URL)
+    etag = make_etag("dictionary", current_version_id(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
+
     flashcards = (
         db.query(Flashcard)
         .filter(Flashcard.gloss.ilike(f"%{query}%"))
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
+from sqlalchemy import insert
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
 import sys
@@ -11,9 +12,9 @@ import models, database, schemas
 from auth import get_current_user
 from schemas import (
     UserCreate, UserOut, Token, UserLogin, UserUpdate,
-    UserProfileResponse, Analytics, PredictionCreate
+    UserProfileResponse, Analytics, PredictionCreate, PredictionBatch
 )
-from crud import create_user, get_user_by_email
+from crud import create_user, get_user_by_email, set_latest_prediction
 from database import get_db
 from utils import verify_password, create_access_token
 from auth import get_current_user
@@ -21,7 +22,7 @@ from models import User
 
 import os
 from uuid import uuid4
-from datetime import datetime
+from datetime import datetime, timezone
 
 router = APIRouter(
     prefix="/users",
@@ -29,6 +30,7 @@ router = APIRouter(
 )
 
 UPLOAD_DIR = "static/uploads"
+MAX_PREDICTION_BATCH = int(os.getenv("MAX_PREDICTION_BATCH", 1000))
 
 
 # ✅ Register new user
@@ -140,19 +142,68 @@ def save_prediction(prediction: schemas.PredictionCreate, db: Session = Depends(
         timestamp=datetime.utcnow()
     )
     db.add(new_entry)
+    db.flush()
+    set_latest_prediction(db, current_user.id, new_entry.id, new_entry.prediction, new_entry.timestamp)
     current_user.total_predictions += 1
     db.commit()
-    db.refresh(new_entry)
     return {"status": "success", "prediction_id": new_entry.id}
 
+def _as_naive_utc(ts: datetime) -> datetime:
+    # flashcard_predictions.timestamp is a naive UTC column
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+@router.post("/api/flashcards/predict/batch")
+def save_predictions_batch(batch: PredictionBatch, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    if len(batch.predictions) > MAX_PREDICTION_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_PREDICTION_BATCH} predictions per batch"
+        )
+    if not batch.predictions:
+        return {"status": "success", "inserted": 0}
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": current_user.id,
+            "prediction": item.prediction,
+            # Client clocks can run ahead; a future timestamp would pin the latest-prediction pointer
+            "timestamp": min(_as_naive_utc(item.timestamp), now) if item.timestamp else now,
+        }
+        for item in batch.predictions
+    ]
+    # Single multi-row INSERT instead of one ORM add/commit per prediction
+    inserted = db.execute(
+        insert(models.FlashcardPrediction)
+        .values(rows)
+        .returning(models.FlashcardPrediction.id, models.FlashcardPrediction.prediction, models.FlashcardPrediction.timestamp)
+    ).all()
+    newest = max(inserted, key=lambda row: (row.timestamp, row.id))
+    set_latest_prediction(db, current_user.id, newest.id, newest.prediction, newest.timestamp)
+    current_user.total_predictions = (current_user.total_predictions or 0) + len(rows)
+    db.commit()
+    return {"status": "success", "inserted": len(rows)}
+
 @router.get("/api/flashcards/predict")
 def get_latest_prediction(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    latest = db.query(models.FlashcardPrediction)\
-               .filter(models.FlashcardPrediction.user_id == current_user.id)\
-               .order_by(models.FlashcardPrediction.timestamp.desc())\
-               .first()
-    print("Latest prediction:", latest)
-    if not latest:
-        return {"prediction": None}
-    return {"prediction": latest}
-    
+    latest = db.get(models.LatestPrediction, current_user.id)
+    if latest is None:
+        # Users with history from before the pointer existed: one indexed lookup, then backfill
+        row = db.query(models.FlashcardPrediction)\
+                .filter(models.FlashcardPrediction.user_id == current_user.id)\
+                .order_by(models.FlashcardPrediction.timestamp.desc())\
+                .first()
+        if not row:
+            return {"prediction": None}
+        set_latest_prediction(db, current_user.id, row.id, row.prediction, row.timestamp)
+        db.commit()
+        latest = db.get(models.LatestPrediction, current_user.id)
+
+    return {"prediction": {
+        "id": latest.prediction_id,
+        "user_id": latest.user_id,
+        "prediction": latest.prediction,
+        "timestamp": latest.timestamp,
+    }}
@@ -62,6 +62,13 @@ class UserUpdate(BaseModel):
 class PredictionCreate(BaseModel):
     prediction: str
 
+class PredictionItem(BaseModel):
+    prediction: str
+    timestamp: Optional[datetime] = None  # when the prediction was made on the client
+
+class PredictionBatch(BaseModel):
+    predictions: List[PredictionItem]
+
 class QuizSubmission(BaseModel):
     level: int
     answers: List[dict] 
\ No newline at end of file
@@ -0,0 +1,202 @@
+import os
+import sys
+import time
+import socket
+import threading
+import socketserver
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import cache as cache_module
+import catalog
+from cache import Cache, CacheError, RedisBackend
+from database import Base
+from models import Flashcard
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """Tiny RESP2 stand-in for Redis: GET/MGET/SET (PX, NX)/DEL/PING on one shared dict."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, port=0):
+        self.data = {}  # key -> (expires_at or None, value)
+        self.lock = threading.Lock()
+        self.connections = []
+        super().__init__(("127.0.0.1", port), RespHandler)
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def live_keys(self):
+        now = time.monotonic()
+        with self.lock:
+            return {k for k, (expires_at, _) in self.data.items() if expires_at is None or expires_at > now}
+
+    def stop(self):
+        """Stops accepting and drops every open connection, like a crashed server."""
+        self.shutdown()
+        self.server_close()
+        for conn in self.connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+                conn.close()
+            except OSError:
+                pass
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections.append(self.request)
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.run(args[0].upper().decode(), args[1:]))
+
+    def _get(self, key, now):
+        item = self.server.data.get(key)
+        if item is None or (item[0] is not None and item[0] <= now):
+            self.server.data.pop(key, None)
+            return None
+        return item[1]
+
+    @staticmethod
+    def _bulk(value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def run(self, command, args):
+        now = time.monotonic()
+        with self.server.lock:
+            if command == "PING":
+                return b"+PONG\r\n"
+            if command == "GET":
+                return self._bulk(self._get(args[0], now))
+            if command == "MGET":
+                return b"*%d\r\n" % len(args) + b"".join(self._bulk(self._get(k, now)) for k in args)
+            if command == "SET":
+                key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+                if b"NX" in options and self._get(key, now) is not None:
+                    return b"$-1\r\n"
+                expires_at = None
+                if b"PX" in options:
+                    expires_at = now + int(options[options.index(b"PX") + 1]) / 1000
+                self.server.data[key] = (expires_at, value)
+                return b"+OK\r\n"
+            if command == "DEL":
+                return b":%d\r\n" % sum(self.server.data.pop(k, None) is not None for k in args)
+            return b"-ERR unknown command '%s'\r\n" % command.encode()
+
+
+@pytest.fixture
+def server():
+    server = RespServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def redis_cache(server):
+    return Cache(RedisBackend(server.url), namespace="test", prefix="t:")
+
+
+def test_get_set_and_delete(redis_cache, server):
+    assert redis_cache.get("missing") is None
+    redis_cache.set("card", {"gloss": "hello", "ids": [1, 2]})
+    assert redis_cache.get("card") == {"gloss": "hello", "ids": [1, 2]}
+    assert b"t:test:card" in server.live_keys()
+
+    redis_cache.delete("card")
+    assert redis_cache.get("card") is None
+    assert redis_cache.get_or_set("card", lambda: [1], ttl=60) == [1]
+    assert redis_cache.get_or_set("card", lambda: [2], ttl=60) == [1]
+
+
+def test_ttl_expires_entries(redis_cache):
+    redis_cache.set("short", 1, ttl=0.05)
+    redis_cache.set("long", 2, ttl=60)
+    time.sleep(0.1)
+    assert redis_cache.get("short") is None
+    assert redis_cache.get("long") == 2
+
+
+def test_invalidate_tags_drops_every_tagged_entry(redis_cache):
+    redis_cache.set("level:1", "a", tags=("catalog",))
+    redis_cache.set("level:2", "b", tags=("catalog",))
+    redis_cache.set("user:1", "c", tags=("user:1",))
+
+    redis_cache.invalidate_tags("catalog")
+    assert redis_cache.get("level:1", tags=("catalog",)) is None
+    assert redis_cache.get("level:2", tags=("catalog",)) is None
+    assert redis_cache.get("user:1", tags=("user:1",)) == "c"
+
+
+def test_lost_connection_falls_back_to_misses(redis_cache, server, monkeypatch):
+    monkeypatch.setattr(cache_module, "RETRY_AFTER", 0.0)
+    redis_cache.set("key", "value")
+    assert redis_cache.get("key") == "value"
+
+    port = server.server_address[1]
+    server.stop()
+    # Errors are misses, writes are dropped, the producer still answers
+    assert redis_cache.get("key") is None
+    redis_cache.set("key", "other")
+    assert redis_cache.get_or_set("key", lambda: "fresh") == "fresh"
+    with pytest.raises(CacheError):
+        redis_cache.backend.execute("PING")
+
+    restarted = RespServer(port)
+    try:
+        redis_cache.set("key", "back")
+        assert redis_cache.get("key") == "back"
+    finally:
+        restarted.stop()
+
+
+def test_skips_server_while_down(server, monkeypatch):
+    backend = RedisBackend(server.url)
+    server.stop()
+    with pytest.raises(CacheError):
+        backend.execute("PING")
+    monkeypatch.setattr(backend, "_connect", lambda: pytest.fail("reconnected during RETRY_AFTER"))
+    with pytest.raises(CacheError, match="unavailable"):
+        backend.execute("PING")
+
+
+def test_level_pages_are_invalidated_on_publish(server, monkeypatch):
+    monkeypatch.setattr(catalog.catalog_cache, "backend", RedisBackend(server.url))
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        db.add_all([Flashcard(gloss=g, video_url=f"{g}.mp4", complexity=1) for g in ("book", "help", "hello")])
+        db.commit()
+        catalog.publish_catalog_version(db)
+
+        page = catalog.get_level_page(db, 1, 0, 2)
+        assert page["total"] == 3
+        assert [c["gloss"] for c in page["cards"]] == ["book", "help"]
+        assert any(b":level:1:0:2:" in key for key in server.live_keys())
+
+        # Unpublished edits aren't visible: the page is served from the cache
+        db.query(Flashcard).filter(Flashcard.gloss == "book").update({"gloss": "books"})
+        db.commit()
+        assert catalog.get_level_page(db, 1, 0, 2)["cards"][0]["gloss"] == "book"
+
+        catalog.publish_catalog_version(db)
+        assert catalog.get_level_page(db, 1, 0, 2)["cards"][0]["gloss"] == "books"
+    finally:
+        db.close()
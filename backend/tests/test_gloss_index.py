@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import gloss_index
+from database import Base
+from gloss_index import GLOSS_KEY, normalize_gloss, resolve_glosses
+from models import Flashcard
+
+STORED = ["thank  you", "thank - you", "Good-Morning", " see\tyou  later ", "book"]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(gloss_index, "_version", None)
+    monkeypatch.setattr(gloss_index, "_entries", {})
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Flashcard(gloss=g, video_url=f"{i}.mp4", complexity=1) for i, g in enumerate(STORED)])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_stored_key_matches_normalize_gloss(db):
+    keys = dict(db.execute(select(Flashcard.gloss, GLOSS_KEY)).all())
+    assert keys == {gloss: normalize_gloss(gloss) for gloss in STORED}
+
+
+def test_multi_space_glosses_resolve(db):
+    playlist = resolve_glosses(db, ["THANK YOU", "good morning", "see you later", "BOOK", "missing"])
+    assert [(gloss, stored) for gloss, _, _, stored in playlist] == [
+        ("THANK YOU", "thank  you"),  # lowest id of the two "thank you" cards
+        ("good morning", "Good-Morning"),
+        ("see you later", " see\tyou  later "),
+        ("BOOK", "book"),
+        ("missing", None),
+    ]
@@ -0,0 +1,61 @@
+import os
+import sys
+import asyncio
+
+import httpx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from url_validator import URLCache, validate_async
+
+OK = "https://cdn.example.com/ok.mp4"
+MISSING = "https://cdn.example.com/missing.mp4"
+MOVED = "https://old.example.com/moved.mp4"
+MOVED_TARGET = "https://cdn.example.com/moved.mp4"
+
+
+def make_transport(requests):
+    def handler(request):
+        url = str(request.url)
+        requests.append((request.method, url))
+        if url == MOVED:
+            return httpx.Response(301, headers={"Location": MOVED_TARGET})
+        if url in (OK, MOVED_TARGET):
+            return httpx.Response(200)
+        return httpx.Response(404)
+    return httpx.MockTransport(handler)
+
+
+def run(urls, cache, requests):
+    return asyncio.run(validate_async(urls, cache, retries=0, transport=make_transport(requests)))
+
+
+def test_validate_ok_404_redirect_and_cached_rerun(tmp_path):
+    cache = URLCache(str(tmp_path / "urls.sqlite3"))
+    try:
+        requests = []
+        valid = run([OK, MISSING, MOVED], cache, requests)
+        assert valid == {OK, MOVED}
+        # 404 on HEAD falls back to a GET before giving up
+        assert ("HEAD", MISSING) in requests and ("GET", MISSING) in requests
+        # the redirect is followed
+        assert ("HEAD", MOVED_TARGET) in requests
+
+        assert cache.fresh_results([OK, MISSING, MOVED]) == {OK: True, MISSING: False, MOVED: True}
+
+        requests = []
+        assert run([OK, MISSING, MOVED], cache, requests) == {OK, MOVED}
+        assert requests == []  # every result came from the cache
+    finally:
+        cache.close()
+
+
+def test_expired_results_are_checked_again(tmp_path):
+    cache = URLCache(str(tmp_path / "urls.sqlite3"), valid_ttl=0, invalid_ttl=0)
+    try:
+        run([OK, MISSING], cache, [])
+        requests = []
+        assert run([OK, MISSING], cache, requests) == {OK}
+        assert ("HEAD", OK) in requests and ("HEAD", MISSING) in requests
+    finally:
+        cache.close()
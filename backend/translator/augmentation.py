@@ -0,0 +1,214 @@
+# augmentation.py
+# Keypoint-sequence augmentation for the 297-dim layout, as whole-array NumPy kernels.
+# Every kernel takes frames shaped (..., 297) — one frame, a sequence or a batch of
+# sequences — and draws its random parameters per frame, applied by broadcasting.
+import numpy as np
+from scipy import interpolate
+from scipy.ndimage import gaussian_filter1d
+
+from landmark_arrays import (
+    COMPUTE_DTYPE, FACE_SLICE, HAND_POINTS, KEYPOINTS_297, LEFT_HAND_SLICE, POSE_POINTS, POSE_SLICE,
+    RIGHT_HAND_SLICE,
+)
+
+VALID_RANGE = (-0.5, 1.5)  # normalized image coordinates plus some margin
+
+# Everything except pose visibility is a coordinate
+COORD_MASK = np.ones(KEYPOINTS_297, dtype=bool)
+COORD_MASK[POSE_SLICE.start + 3:POSE_SLICE.stop:4] = False
+
+# Per-feature noise std: lower for pose, minimal for the face, higher for the hands
+NOISE_STD = np.zeros(KEYPOINTS_297, dtype=COMPUTE_DTYPE)
+NOISE_STD[POSE_SLICE] = 0.008
+NOISE_STD[FACE_SLICE] = 0.005
+NOISE_STD[LEFT_HAND_SLICE] = 0.015
+NOISE_STD[RIGHT_HAND_SLICE] = 0.015
+
+BODY_PARTS = ["hands", "face", "pose", "all"]
+BODY_PART_WEIGHTS = [0.4, 0.2, 0.2, 0.2]  # Emphasize hands for sign language
+
+STRENGTHS = {
+    # strength: (temporal techniques, probability of a spatial augmentation per frame)
+    "light": (["speed_variation"], 0.3),
+    "medium": (["speed_variation", "pause_insertion", "motion_smoothing"], 0.6),
+    "heavy": (["speed_variation", "pause_insertion", "motion_smoothing"], 0.8),
+}
+NOISE_PROB = 0.7
+
+_default_rng = np.random.default_rng()
+
+
+def valid_frames(frames):
+    """Per-frame bool: finite and every coordinate within VALID_RANGE."""
+    frames = np.asarray(frames)
+    coords = frames[..., COORD_MASK]
+    low, high = VALID_RANGE
+    return np.isfinite(frames).all(axis=-1) & ((coords >= low) & (coords <= high)).all(axis=-1)
+
+
+def temporal_augmentation(sequence, technique, sequence_length, rng=None):
+    """Resamples a (T, F) sequence to sequence_length frames with the given technique."""
+    rng = rng or _default_rng
+    if len(sequence) < 5:
+        return sequence
+
+    t_original = np.linspace(0, 1, len(sequence))
+    if technique == "speed_variation":
+        # Non-linear speed variation (slow start, fast middle, slow end)
+        speed_factor = rng.uniform(0.7, 1.4)
+        sigmoid_factor = rng.uniform(2, 6)
+        t_new = np.linspace(0, 1, sequence_length)
+        speed_profile = 1 / (1 + np.exp(-sigmoid_factor * (t_new - 0.5)))
+        speed_profile = (speed_profile - speed_profile.min()) / (speed_profile.max() - speed_profile.min())
+        speed_profile = speed_profile * speed_factor + (1 - speed_factor) / 2
+        cumulative_speed = np.cumsum(speed_profile)
+        cumulative_speed = cumulative_speed / cumulative_speed[-1]
+
+    elif technique == "pause_insertion":
+        # Hold one point in time for ~10% of the sequence (common in sign language)
+        cumulative_speed = np.linspace(0, 1, sequence_length)
+        if rng.random() < 0.3:
+            pause_start = rng.uniform(0.3, 0.7)
+            pause_end = min(1.0, pause_start + 0.1)
+            cumulative_speed[(cumulative_speed >= pause_start) & (cumulative_speed <= pause_end)] = pause_start
+
+    elif technique == "motion_smoothing":
+        # Gaussian smoothing along time for more fluid motion
+        smoothed = gaussian_filter1d(sequence, sigma=rng.uniform(0.5, 2.0), axis=0)
+        return smoothed[:sequence_length]
+
+    else:  # Linear resampling
+        cumulative_speed = np.linspace(0, 1, sequence_length)
+
+    try:
+        # Cubic spline over all features at once for smoother motion
+        return interpolate.CubicSpline(t_original, sequence, axis=0, bc_type="natural")(cumulative_speed)
+    except ValueError:
+        resample = interpolate.interp1d(
+            t_original, sequence, kind="linear", axis=0, bounds_error=False, fill_value="extrapolate"
+        )
+        return resample(cumulative_speed)
+
+
+def _scale_about_center(points, factor, apply):
+    """Scales (N, P, 3) points about their mean; only detected points (x != 0) of parts with any data, where apply."""
+    center = points.mean(axis=1, keepdims=True)
+    has_data = (points != 0).any(axis=(1, 2))
+    mask = (apply & has_data)[:, None] & (points[..., 0] != 0)
+    scaled = center + (points - center) * factor[:, None, None]
+    return np.where(mask[..., None], scaled, points)
+
+
+def spatial_augmentation(frames, hands, face, pose, rng=None):
+    """
+    Pose-aware spatial augmentation. hands/face/pose are per-frame bool masks
+    (shape frames.shape[:-1]) choosing which parts to perturb in each frame:
+    hands and face are scaled about their center, the pose is rotated a few
+    degrees about the image center. Undetected (zero) points stay zero.
+    """
+    rng = rng or _default_rng
+    shape = frames.shape
+    flat = frames.reshape(-1, shape[-1])
+    out = flat.copy()
+    n = len(flat)
+    hands, face, pose = (np.asarray(m, dtype=bool).reshape(n) for m in (hands, face, pose))
+
+    # Same emphasis for both hands of a frame
+    hand_emphasis = rng.uniform(0.95, 1.15, size=n)
+    for part in (LEFT_HAND_SLICE, RIGHT_HAND_SLICE):
+        points = flat[:, part].reshape(n, HAND_POINTS, 3)
+        out[:, part] = _scale_about_center(points, hand_emphasis, hands).reshape(n, -1)
+
+    face_points = flat[:, FACE_SLICE].reshape(n, -1, 3)
+    out[:, FACE_SLICE] = _scale_about_center(face_points, rng.uniform(0.98, 1.05, size=n), face).reshape(n, -1)
+
+    # Small rotation of pose x,y around (0.5, 0.5)
+    angle = rng.uniform(-5, 5, size=n) * np.pi / 180
+    cos_angle, sin_angle = np.cos(angle)[:, None], np.sin(angle)[:, None]
+    body = flat[:, POSE_SLICE].reshape(n, POSE_POINTS, 4)
+    x, y = body[..., 0] - 0.5, body[..., 1] - 0.5
+    rotate = pose[:, None] & (body[..., 0] != 0)
+    rotated = out[:, POSE_SLICE].reshape(n, POSE_POINTS, 4)
+    rotated[..., 0] = np.where(rotate, x * cos_angle - y * sin_angle + 0.5, body[..., 0])
+    rotated[..., 1] = np.where(rotate, x * sin_angle + y * cos_angle + 0.5, body[..., 1])
+    out[:, POSE_SLICE] = rotated.reshape(n, -1)
+
+    return out.reshape(shape)
+
+
+def noise_augmentation(frames, apply, rng=None):
+    """Adds NOISE_STD gaussian noise to the non-zero features of the frames selected by apply."""
+    rng = rng or _default_rng
+    noise = rng.standard_normal(frames.shape, dtype=COMPUTE_DTYPE) * NOISE_STD
+    mask = np.asarray(apply, dtype=bool)[..., None] & (frames != 0)
+    return np.where(mask, frames + noise, frames).astype(frames.dtype, copy=False)
+
+
+def augment_frames(frames, spatial_prob, rng=None):
+    """
+    Per-frame spatial augmentation, noise and clipping for (..., 297) frames.
+    spatial_prob is a scalar or broadcasts against frames.shape[:-1] (e.g. (B, 1) per sequence).
+    """
+    rng = rng or _default_rng
+    shape = frames.shape[:-1]
+    spatial = rng.random(shape) < spatial_prob
+    part = rng.choice(len(BODY_PARTS), size=shape, p=BODY_PART_WEIGHTS)
+    every = BODY_PARTS.index("all")
+    frames = spatial_augmentation(
+        frames,
+        hands=spatial & ((part == BODY_PARTS.index("hands")) | (part == every)),
+        face=spatial & ((part == BODY_PARTS.index("face")) | (part == every)),
+        pose=spatial & ((part == BODY_PARTS.index("pose")) | (part == every)),
+        rng=rng,
+    )
+    frames = noise_augmentation(frames, rng.random(shape) < NOISE_PROB, rng)
+    return np.clip(frames, *VALID_RANGE)
+
+
+def _fit_length(sequence, sequence_length, num_features):
+    """Truncates, or pads by repeating the last frame, to exactly sequence_length frames."""
+    if len(sequence) > sequence_length:
+        return sequence[:sequence_length]
+    if len(sequence) < sequence_length:
+        pad_length = sequence_length - len(sequence)
+        if len(sequence) > 0:
+            padding = np.tile(sequence[-1], (pad_length, 1))
+        else:
+            padding = np.zeros((pad_length, num_features), dtype=sequence.dtype)
+        return np.vstack((sequence, padding))
+    return sequence
+
+
+def augment_sequence(sequence, sequence_length, strength="medium", rng=None):
+    """
+    One augmented copy of a (T, 297) sequence, resampled to sequence_length
+    frames, or None if the result falls outside the valid range.
+    """
+    rng = rng or _default_rng
+    techniques, spatial_prob = STRENGTHS[strength]
+    augmented = temporal_augmentation(sequence, rng.choice(techniques), sequence_length, rng)
+    augmented = _fit_length(augmented, sequence_length, sequence.shape[1])
+
+    augmented = augment_frames(np.asarray(augmented, dtype=sequence.dtype), spatial_prob, rng)
+    return augmented if valid_frames(augmented).all() else None
+
+
+def augment_batch(sequences, strengths, rng=None):
+    """
+    Augmented copies of a (B, T, 297) batch with one strength per sequence.
+    Temporal resampling runs per sequence, the spatial/noise kernels once for
+    the whole batch. Sequences whose copy falls outside the valid range are
+    returned unchanged.
+    """
+    rng = rng or _default_rng
+    sequence_length, num_features = sequences.shape[1:]
+    resampled = np.empty_like(sequences)
+    spatial_prob = np.empty((len(sequences), 1))
+    for i, (sequence, strength) in enumerate(zip(sequences, strengths)):
+        techniques, spatial_prob[i] = STRENGTHS[strength]
+        augmented = temporal_augmentation(sequence, rng.choice(techniques), sequence_length, rng)
+        resampled[i] = _fit_length(augmented, sequence_length, num_features)
+
+    augmented = augment_frames(resampled, spatial_prob, rng)
+    keep = valid_frames(augmented).all(axis=1)
+    return np.where(keep[:, None, None], augmented, sequences)
@@ -0,0 +1,151 @@
+import os
+import re
+import json
+import time
+import threading
+from functools import lru_cache
+
+# Bundled with the repo, so the glossizer starts without any network access
+GLOSS_DICT_PATH = os.getenv(
+    "GLOSS_DICT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "expanded_gloss_dict.json")
+)
+GLOSS_CACHE_SIZE = int(os.getenv("GLOSS_CACHE_SIZE", 4096))
+RELOAD_CHECK_INTERVAL = float(os.getenv("GLOSS_RELOAD_CHECK_INTERVAL", 2.0))  # seconds between mtime checks
+
+# Compiled tokenizer covering what word_tokenize did for our input: words/numbers,
+# Treebank-style contractions ("don't" -> "do", "n't"; "it's" -> "it", "'s") and
+# punctuation as separate tokens.
+TOKEN_RE = re.compile(
+    r"""
+      \w+(?=n't\b)                # "do" in "don't", "ca" in "can't"
+    | n't\b
+    | '(?:s|m|d|re|ve|ll)\b
+    | \w+(?:[-.]\w+)*             # words, numbers, hyphenated words
+    | [^\w\s]                     # punctuation
+    """,
+    re.VERBOSE,
+)
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def tokenize(text: str):
+    return TOKEN_RE.findall(text.lower())
+
+
+def split_sentences(document: str):
+    return [s.strip() for s in SENTENCE_SPLIT_RE.split(document) if s.strip()]
+
+
+def load_gloss_dict(path=GLOSS_DICT_PATH):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+_END = None  # trie key holding the gloss of the phrase ending at that node
+
+
+class GlossMatcher:
+    """
+    The gloss dictionary, multi-word keys included ("thank you", "don't want"),
+    compiled into a token trie. match() scans the sentence once, left to right,
+    and at each position takes the longest dictionary phrase starting there.
+    The work per position is bounded by the longest phrase, so matching is
+    linear in the sentence length.
+    """
+
+    def __init__(self, entries: dict, generation: int = 0):
+        self.generation = generation
+        self.root = {}
+        for key, gloss in entries.items():
+            tokens = tokenize(key)
+            if not tokens:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_END] = gloss.upper() if gloss else None
+
+    def match(self, tokens):
+        gloss = []
+        i, n = 0, len(tokens)
+        while i < n:
+            node = self.root
+            best_len, best_gloss = 0, None
+            j = i
+            while j < n:
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    best_len, best_gloss = j - i, node[_END]
+
+            if best_len:
+                if best_gloss:  # null entries (articles, "to be") are dropped
+                    gloss.append(best_gloss)
+                i += best_len
+            else:
+                i += 1
+        return gloss
+
+
+class _MatcherHolder:
+    """Keeps the compiled matcher and swaps in a new one when the dictionary file changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = os.stat(path).st_mtime
+        self.matcher = GlossMatcher(load_gloss_dict(path))
+        self.next_check = time.monotonic() + RELOAD_CHECK_INTERVAL
+
+    def get(self):
+        now = time.monotonic()
+        if now >= self.next_check and self.lock.acquire(blocking=False):
+            try:
+                self.next_check = now + RELOAD_CHECK_INTERVAL
+                mtime = os.stat(self.path).st_mtime
+                if mtime != self.mtime:
+                    self._reload(mtime)
+            except OSError:
+                pass  # file briefly missing while being replaced, keep the current matcher
+            finally:
+                self.lock.release()
+        return self.matcher
+
+    def _reload(self, mtime):
+        try:
+            entries = load_gloss_dict(self.path)
+        except ValueError as e:
+            print(f"⚠️ Gloss dictionary not reloaded (invalid JSON): {e}")
+            return
+        # Build fully, then publish with a single reference assignment
+        self.matcher = GlossMatcher(entries, self.matcher.generation + 1)
+        self.mtime = mtime
+        _glossize_cached.cache_clear()
+        print(f"🔄 Gloss dictionary reloaded ({len(entries)} entries)")
+
+
+_holder = _MatcherHolder(GLOSS_DICT_PATH)
+
+
+def get_matcher() -> GlossMatcher:
+    return _holder.get()
+
+
+@lru_cache(maxsize=GLOSS_CACHE_SIZE)
+def _glossize_cached(normalized: str, matcher: GlossMatcher):
+    # Keyed by the matcher too, so a result from an old dictionary is never served
+    return tuple(matcher.match(tokenize(normalized)))
+
+
+def glossize(sentence: str):
+    # Whitespace/case differences don't change the result, so they share a cache entry
+    return list(_glossize_cached(" ".join(sentence.lower().split()), get_matcher()))
+
+
+def glossize_many(sentences):
+    for i, sentence in enumerate(sentences):
+        if not isinstance(sentence, str):
+            raise TypeError(f"sentences[{i}] must be a string, not {type(sentence).__name__}")
+    return [glossize(sentence) for sentence in sentences]
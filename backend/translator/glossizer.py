@@ -1,10 +1,7 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import json
-from nltk.tokenize import word_tokenize
-import nltk
+from gloss_engine import glossize, glossize_many, split_sentences
 
-nltk.download('punkt')
 app = FastAPI()
 
 # Enable CORS for frontend access
@@ -16,23 +13,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load your gloss dictionary
-with open("expanded_gloss_dict.json", "r") as f:
-    gloss_dict = json.load(f)
+MAX_BATCH_SENTENCES = 10000
 
-def glossize(sentence: str):
-    tokens = word_tokenize(sentence.lower())
-    gloss = []
 
-    for word in tokens:
-        mapped = gloss_dict.get(word)
-        if mapped:
-            gloss.append(mapped.upper())
-    return gloss
+async def _json_object(request: Request) -> dict:
+    """The request body as a JSON object, or a 422 for anything else."""
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Request body must be valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=422, detail="Request body must be a JSON object")
+    return data
+
 
 @app.post("/api/gloss")
 async def get_gloss(request: Request):
-    data = await request.json()
+    data = await _json_object(request)
     sentence = data.get("sentence", "")
+    if not isinstance(sentence, str):
+        raise HTTPException(status_code=422, detail="sentence must be a string")
     gloss = glossize(sentence)
     return {"input": sentence, "gloss": gloss}
+
+
+@app.post("/api/gloss/batch")
+async def get_gloss_batch(request: Request):
+    """Glossizes a list of sentences ({"sentences": [...]}) or a whole document ({"document": "..."})."""
+    data = await _json_object(request)
+    if "document" in data:
+        document = data.get("document") or ""
+        if not isinstance(document, str):
+            raise HTTPException(status_code=422, detail="document must be a string")
+        sentences = split_sentences(document)
+    else:
+        sentences = data.get("sentences") or []
+        if not isinstance(sentences, list):
+            raise HTTPException(status_code=422, detail="sentences must be a list of strings")
+
+    if len(sentences) > MAX_BATCH_SENTENCES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SENTENCES} sentences per request")
+
+    try:
+        glosses = glossize_many(sentences)
+    except TypeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {
+        "results": [
+            {"input": sentence, "gloss": gloss}
+            for sentence, gloss in zip(sentences, glosses)
+        ]
+    }
@@ -5,11 +5,14 @@ from tensorflow.keras.models import load_model
 from collections import deque
 import time
 
+from landmark_arrays import COMPUTE_DTYPE, keypoints_297
+
 # Load model and class names
 model = load_model("asl_model.h5", compile=False)
 actions = np.load("classes.npy")
-training_mean = np.load("training_mean.npy")
-training_std = np.load("training_std.npy")
+# Normalize in float32, like training batches
+training_mean = np.load("training_mean.npy").astype(COMPUTE_DTYPE)
+training_scale = (1 / (np.load("training_std.npy") + 1e-8)).astype(COMPUTE_DTYPE)
 
 # Setup mediapipe
 mp_holistic = mp.solutions.holistic
@@ -18,7 +21,6 @@ mp_drawing_styles = mp.solutions.drawing_styles
 
 # Configuration
 SEQUENCE_LENGTH = 30
-FACE_SELECTION = [10, 33, 61, 105, 133, 152, 159, 191, 263, 291, 323, 356, 386]
 PREDICTION_THRESHOLD = 0.7
 CONFIDENCE_DELTA = 0.15
 CONFIDENCE_WINDOW = 15
@@ -83,37 +85,6 @@ def draw_landmarks(image, results):
         )
 
 
-def extract_keypoints(results):
-    keypoints = []
-
-    if results.pose_landmarks:
-        for res in results.pose_landmarks.landmark:
-            keypoints.extend([res.x, res.y, res.z, res.visibility])
-    else:
-        keypoints.extend([0] * 33 * 4)
-
-    if results.face_landmarks:
-        for i, res in enumerate(results.face_landmarks.landmark):
-            if i in FACE_SELECTION:
-                keypoints.extend([res.x, res.y, res.z])
-    else:
-        keypoints.extend([0] * len(FACE_SELECTION) * 3)
-
-    if results.left_hand_landmarks:
-        for res in results.left_hand_landmarks.landmark:
-            keypoints.extend([res.x, res.y, res.z])
-    else:
-        keypoints.extend([0] * 21 * 3)
-
-    if results.right_hand_landmarks:
-        for res in results.right_hand_landmarks.landmark:
-            keypoints.extend([res.x, res.y, res.z])
-    else:
-        keypoints.extend([0] * 21 * 3)
-
-    return np.array(keypoints)
-
-
 cap = cv2.VideoCapture(0)
 if not cap.isOpened():
     raise IOError("Cannot open webcam")
@@ -143,11 +114,11 @@ with mp_holistic.Holistic(
         elif current_time - hand_detection_time > 2.0:
             hand_detected = False
 
-        keypoints = extract_keypoints(results)
+        keypoints = keypoints_297(results)
         sequence.append(keypoints)
 
         if len(sequence) == SEQUENCE_LENGTH and hand_detected:
-            input_data = (np.array(sequence) - training_mean) / (training_std + 1e-8)
+            input_data = (np.array(sequence, dtype=COMPUTE_DTYPE) - training_mean) * training_scale
             input_data = np.expand_dims(input_data, axis=0)
 
             res = model.predict(input_data, verbose=0)[0]
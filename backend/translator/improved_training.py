@@ -29,6 +29,8 @@ from tensorflow.keras.callbacks import (
 )
 from tensorflow.keras.regularizers import l2
 import tensorflow as tf
+from packed_dataset import PACKED_PATH, X_FILE, feature_stats, load_or_pack
+from training_pipeline import AUGMENT_WORKERS, BatchMaker, BatchPool, make_eval_dataset, make_train_dataset
 
 # Configuration
 DATA_PATH = "MP_Data"
@@ -40,70 +42,8 @@ actions = np.array( [
 ])  # Expanded vocabulary
 no_sequences = 50  # Matches dataset
 sequence_length = 30
-
-# Load and preprocess data
-label_map = {label: num for num, label in enumerate(actions)}
-sequences, labels = [], []
-
-for action in actions:
-    action_dir = os.path.join(DATA_PATH, action)
-    if not os.path.exists(action_dir):
-        print(f"⚠️ Directory not found: {action_dir}")
-        continue
-
-    for sequence in os.listdir(action_dir):
-        sequence_path = os.path.join(action_dir, sequence)
-        if not os.path.isdir(sequence_path):
-            continue
-
-        window = []
-        valid_sequence = True
-
-        for frame_num in range(sequence_length):
-            frame_path = os.path.join(sequence_path, f"{frame_num}.npy")
-            if not os.path.exists(frame_path):
-                valid_sequence = False
-                break
-
-            res = np.load(frame_path)
-            window.append(res)
-
-        if valid_sequence:
-            sequences.append(window)
-            labels.append(label_map[action])
-
-X = np.array(sequences)
-y = to_categorical(LabelEncoder().fit_transform(labels))
-
-# Train-test split with stratification
-X_train, X_test, y_train, y_test = train_test_split(
-    X,
-    y,
-    test_size=0.15,
-    stratify=y,
-    random_state=42,
-)
-
-# Validation split
-X_train, X_val, y_train, y_val = train_test_split(
-    X_train,
-    y_train,
-    test_size=0.15,
-    stratify=y_train,
-    random_state=42,
-)
-
-# Normalize data
-training_mean = np.mean(X_train, axis=(0, 1))
-training_std = np.std(X_train, axis=(0, 1))
-
-X_train = (X_train - training_mean) / (training_std + 1e-8)
-X_val = (X_val - training_mean) / (training_std + 1e-8)
-X_test = (X_test - training_mean) / (training_std + 1e-8)
-
-# Save normalization parameters
-np.save("training_mean.npy", training_mean)
-np.save("training_std.npy", training_std)
+epochs = 200
+batch_size = 32
 
 
 # Attention Mechanism
@@ -124,8 +64,8 @@ def attention_block(inputs):
 
 
 # Enhanced Hybrid Model
-def create_model():
-    inputs = Input(shape=(sequence_length, X_train.shape[-1]))
+def create_model(num_features):
+    inputs = Input(shape=(sequence_length, num_features))
 
     # Input normalization
     x = LayerNormalization(axis=-1)(inputs)
@@ -171,58 +111,105 @@ def create_model():
     return model
 
 
-model = create_model()
-model.summary()
-
-# Configure callbacks
-early_stopping = EarlyStopping(
-    monitor="val_loss", patience=30, restore_best_weights=True, verbose=1
-)
-
-reduce_lr = ReduceLROnPlateau(
-    monitor="val_loss", factor=0.2, patience=10, min_lr=1e-6, verbose=1
-)
-
-model_checkpoint = ModelCheckpoint(
-    "best_asl_model.h5",
-    monitor="val_categorical_accuracy",
-    save_best_only=True,
-    mode="max",
-    verbose=1,
-)
-
-tensorboard = TensorBoard(
-    log_dir="logs", histogram_freq=1, write_graph=True, update_freq="epoch"
-)
-
-# Compile model
-optimizer = Nadam(learning_rate=0.0005, clipnorm=1.0)
-model.compile(
-    optimizer=optimizer,
-    loss="categorical_crossentropy",
-    metrics=["categorical_accuracy"],
-)
-
-# Train model
-history = model.fit(
-    X_train,
-    y_train,
-    epochs=200,
-    batch_size=32,
-    validation_data=(X_val, y_val),
-    callbacks=[early_stopping, reduce_lr, model_checkpoint, tensorboard],
-    verbose=1,
-)
-
-# Load best model
-model.load_weights("best_asl_model.h5")
-
-# Evaluate on test set
-test_loss, test_acc = model.evaluate(X_test, y_test, verbose=0)
-print(f"\nTest Accuracy: {test_acc:.4f}")
-print(f"Test Loss: {test_loss:.4f}")
-
-# Save final model
-model.save("asl_model.h5")
-np.save("classes.npy", actions)
-print("Model saved successfully")
+def main():
+    # Load and preprocess data: one memory map of the packed (N, T, F) dataset,
+    # rebuilt from MP_Data only when the collection output changed
+    X, labels, dataset_index = load_or_pack(DATA_PATH, PACKED_PATH, actions, sequence_length)
+    print(f"Loaded {len(X)} sequences of shape {X.shape[1:]} from {PACKED_PATH}")
+    y = to_categorical(LabelEncoder().fit_transform(labels))
+
+    # Split row indices (not the data) with stratification, so X stays a memory map
+    # and each batch reads only its own rows
+    rows = np.arange(len(X))
+    train_rows, test_rows = train_test_split(
+        rows,
+        test_size=0.15,
+        stratify=y,
+        random_state=42,
+    )
+
+    # Validation split
+    train_rows, val_rows = train_test_split(
+        train_rows,
+        test_size=0.15,
+        stratify=y[train_rows],
+        random_state=42,
+    )
+
+    # Normalization stats of the training split, streamed over the memory map and cached with the packed data
+    training_mean, training_std = feature_stats(PACKED_PATH, X, train_rows)
+
+    # Training batches are augmented on the fly (fresh every epoch) and normalized in the
+    # pipeline, by worker processes started here, before Keras builds anything
+    make_batch = BatchMaker(
+        os.path.join(PACKED_PATH, X_FILE), y, training_mean, training_std, rows=train_rows, batch_size=batch_size, seed=42
+    )
+    batch_pool = BatchPool(make_batch, AUGMENT_WORKERS)
+    train_dataset, steps_per_epoch = make_train_dataset(batch_pool, epochs)
+    val_dataset = make_eval_dataset(X, y, training_mean, training_std, val_rows, batch_size=batch_size)
+    test_dataset = make_eval_dataset(X, y, training_mean, training_std, test_rows, batch_size=batch_size)
+
+    # Save normalization parameters
+    np.save("training_mean.npy", training_mean)
+    np.save("training_std.npy", training_std)
+
+    model = create_model(X.shape[-1])
+    model.summary()
+
+    # Configure callbacks
+    early_stopping = EarlyStopping(
+        monitor="val_loss", patience=30, restore_best_weights=True, verbose=1
+    )
+
+    reduce_lr = ReduceLROnPlateau(
+        monitor="val_loss", factor=0.2, patience=10, min_lr=1e-6, verbose=1
+    )
+
+    model_checkpoint = ModelCheckpoint(
+        "best_asl_model.h5",
+        monitor="val_categorical_accuracy",
+        save_best_only=True,
+        mode="max",
+        verbose=1,
+    )
+
+    tensorboard = TensorBoard(
+        log_dir="logs", histogram_freq=1, write_graph=True, update_freq="epoch"
+    )
+
+    # Compile model
+    optimizer = Nadam(learning_rate=0.0005, clipnorm=1.0)
+    model.compile(
+        optimizer=optimizer,
+        loss="categorical_crossentropy",
+        metrics=["categorical_accuracy"],
+    )
+
+    # Train model
+    with batch_pool:
+        history = model.fit(
+            train_dataset,
+            epochs=epochs,
+            steps_per_epoch=steps_per_epoch,
+            validation_data=val_dataset,
+            callbacks=[early_stopping, reduce_lr, model_checkpoint, tensorboard],
+            verbose=1,
+        )
+
+    # Load best model
+    model.load_weights("best_asl_model.h5")
+
+    # Evaluate on test set
+    test_loss, test_acc = model.evaluate(test_dataset, verbose=0)
+    print(f"\nTest Accuracy: {test_acc:.4f}")
+    print(f"Test Loss: {test_loss:.4f}")
+
+    # Save final model
+    model.save("asl_model.h5")
+    np.save("classes.npy", actions)
+    print("Model saved successfully")
+
+
+# Augmentation workers import this script, so only train when it's run directly
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# keypoint_format.py
+# Compact columnar binary format (.kpb) for per-video landmark sequences, replacing the
+# nested JSON lists written by extract_keypoints / simplify_all_keypoints.
+#
+# Layout (little endian):
+#   b"KPB1" | u32 header length | header JSON (utf-8) | padding to 8 bytes | sections
+# The header lists every body part with its shape and the offsets (from the first
+# section, each 8-byte aligned) of two sections:
+# a bit-packed presence mask (one bit per frame) and the coordinates of the frames
+# where the part was detected, as a (present frames, points, dims) float16/float32 array.
+#
+# Convert a JSON folder:  python keypoint_format.py <json dir> <out dir> [float16|float32]
+import os
+import sys
+import json
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"KPB1"
+EXTENSION = ".kpb"
+FORMAT_VERSION = 1
+DTYPES = ("float16", "float32")
+JSON_PARTS = ("pose", "left_hand", "right_hand", "face")  # extract_keypoints frame order
+
+
+class KeypointPart:
+    """One body part: data (frames, points, dims), zeros where present is False."""
+
+    def __init__(self, data, present):
+        self.data = data
+        self.present = present
+
+
+class KeypointFile:
+    def __init__(self, frames, parts, meta):
+        self.frames = frames
+        self.parts = parts  # name -> KeypointPart, in file order
+        self.meta = meta
+
+    def __getitem__(self, name):
+        return self.parts[name]
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def encode(parts, dtype="float32", meta=None):
+    """
+    parts: {name: (data, present)} with data (T, points, dims) and present (T,) bool.
+    Returns the file contents as bytes.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype {dtype!r}, expected one of {DTYPES}")
+    frames = None
+    sections, entries = [], []
+    for name, (data, present) in parts.items():
+        data = np.asarray(data)
+        present = np.asarray(present, dtype=bool)
+        if frames is None:
+            frames = len(present)
+        if len(present) != frames or len(data) != frames:
+            raise ValueError(f"Part {name!r} has {len(data)} frames, expected {frames}")
+        entries.append({"name": name, "points": int(data.shape[1]), "dims": int(data.shape[2]),
+                        "present": int(present.sum())})
+        sections.append(np.packbits(present, bitorder="little").tobytes())
+        sections.append(np.ascontiguousarray(data[present], dtype="<" + np.dtype(dtype).str[1:]).tobytes())
+
+    # Section offsets are relative to the first section, right after the header
+    offset = 0
+    for entry, mask, values in zip(entries, sections[0::2], sections[1::2]):
+        entry["mask_offset"] = offset
+        offset = _align(offset + len(mask))
+        entry["data_offset"] = offset
+        offset = _align(offset + len(values))
+
+    header = {"version": FORMAT_VERSION, "dtype": dtype, "frames": frames or 0, "parts": entries, "meta": meta or {}}
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    base = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    out = bytearray(base + offset)
+    out[:4] = MAGIC
+    out[4:8] = struct.pack("<I", len(header_bytes))
+    out[8:8 + len(header_bytes)] = header_bytes
+    for entry, mask, values in zip(entries, sections[0::2], sections[1::2]):
+        out[base + entry["mask_offset"]:base + entry["mask_offset"] + len(mask)] = mask
+        out[base + entry["data_offset"]:base + entry["data_offset"] + len(values)] = values
+    return bytes(out)
+
+
+def decode(buffer):
+    buffer = memoryview(buffer)
+    if bytes(buffer[:4]) != MAGIC:
+        raise ValueError("Not a keypoint file (bad magic)")
+    header_length = struct.unpack("<I", buffer[4:8])[0]
+    header = json.loads(bytes(buffer[8:8 + header_length]))
+    base = _align(8 + header_length)
+    if header["version"] > FORMAT_VERSION:
+        raise ValueError(f"Keypoint file version {header['version']} is newer than this reader")
+
+    frames = header["frames"]
+    dtype = np.dtype("<" + np.dtype(header["dtype"]).str[1:])
+    parts = {}
+    for entry in header["parts"]:
+        mask = np.frombuffer(buffer, np.uint8, count=(frames + 7) // 8, offset=base + entry["mask_offset"])
+        present = np.unpackbits(mask, count=frames, bitorder="little").astype(bool)
+        shape = (entry["present"], entry["points"], entry["dims"])
+        values = np.frombuffer(buffer, dtype, count=int(np.prod(shape)), offset=base + entry["data_offset"]).reshape(shape)
+        data = np.zeros((frames, entry["points"], entry["dims"]), dtype=np.float32)
+        data[present] = values
+        parts[entry["name"]] = KeypointPart(data, present)
+    return KeypointFile(frames, parts, header["meta"])
+
+
+def write(path, parts, dtype="float32", meta=None):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode(parts, dtype, meta))
+    os.replace(tmp_path, path)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+# ===== JSON interop =====
+
+def parts_from_json_frames(frames, dtype=np.float32):
+    """
+    extract_keypoints / simplify_all_keypoints JSON frames -> parts, with data
+    in dtype. A part given as a dict of named joints (simplified pose) keeps
+    the joint names in meta["joints"][part]. Returns (parts, meta).
+    """
+    names = []
+    for frame in frames:
+        for name in frame:
+            if name not in names:
+                names.append(name)
+
+    parts, joints = {}, {}
+    for name in names:
+        values = [frame.get(name) for frame in frames]
+        if any(isinstance(v, dict) for v in values):
+            joints[name] = next(list(v) for v in values if isinstance(v, dict))
+            values = [[v[j] for j in joints[name]] if v else [] for v in values]
+        points = max((len(v) for v in values if v), default=0)
+        dims = max((len(p) for v in values if v for p in v), default=3)
+        data = np.zeros((len(frames), points, dims), dtype=dtype)
+        present = np.zeros(len(frames), dtype=bool)
+        for t, v in enumerate(values):
+            if v:
+                data[t, :len(v)] = v
+                present[t] = True
+        parts[name] = (data, present)
+    return parts, ({"joints": joints} if joints else {})
+
+
+def parts_to_json_frames(parts, meta=None):
+    """{name: (data, present)} -> JSON frames ([] for undetected parts, named joints as dicts)."""
+    joints = (meta or {}).get("joints", {})
+    columns = {name: data.tolist() for name, (data, _) in parts.items()}
+    frames = []
+    for t in range(len(next(iter(parts.values()))[1]) if parts else 0):
+        frame = {}
+        for name, (_, present) in parts.items():
+            if name in joints:
+                frame[name] = dict(zip(joints[name], columns[name][t])) if present[t] else {}
+            else:
+                frame[name] = columns[name][t] if present[t] else []
+        frames.append(frame)
+    return frames
+
+
+def to_json_frames(keypoints):
+    """KeypointFile -> the JSON frame layout it was converted from."""
+    parts = {name: (part.data, part.present) for name, part in keypoints.parts.items()}
+    return parts_to_json_frames(parts, keypoints.meta)
+
+
+def load_frames(path):
+    """JSON frames from either a .kpb or a .json file."""
+    if path.endswith(EXTENSION):
+        return to_json_frames(read(path))
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def convert_folder(json_dir, out_dir, dtype="float32"):
+    """Converts every .json in json_dir to .kpb in out_dir; returns (json bytes, kpb bytes, json s, kpb s)."""
+    os.makedirs(out_dir, exist_ok=True)
+    json_bytes = kpb_bytes = 0
+    json_seconds = kpb_seconds = 0.0
+    for filename in sorted(f for f in os.listdir(json_dir) if f.endswith(".json")):
+        json_path = os.path.join(json_dir, filename)
+        out_path = os.path.join(out_dir, filename[:-len(".json")] + EXTENSION)
+
+        start = time.perf_counter()
+        with open(json_path, "r") as f:
+            frames = json.load(f)
+        json_seconds += time.perf_counter() - start
+
+        parts, meta = parts_from_json_frames(frames)
+        write(out_path, parts, dtype, meta)
+
+        start = time.perf_counter()
+        read(out_path)
+        kpb_seconds += time.perf_counter() - start
+
+        json_bytes += os.path.getsize(json_path)
+        kpb_bytes += os.path.getsize(out_path)
+    return json_bytes, kpb_bytes, json_seconds, kpb_seconds
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python keypoint_format.py <json dir> <out dir> [float16|float32]")
+        sys.exit(1)
+    dtype = sys.argv[3] if len(sys.argv) > 3 else "float32"
+    json_bytes, kpb_bytes, json_seconds, kpb_seconds = convert_folder(sys.argv[1], sys.argv[2], dtype)
+    if not json_bytes:
+        print(f"No .json files in {sys.argv[1]}")
+        sys.exit(0)
+    print(f"✅ Converted {sys.argv[1]} -> {sys.argv[2]} ({dtype})")
+    print(f"   size:  {json_bytes / 1e6:.1f} MB -> {kpb_bytes / 1e6:.1f} MB ({json_bytes / kpb_bytes:.1f}x smaller)")
+    print(f"   parse: {json_seconds:.2f}s -> {kpb_seconds:.2f}s ({json_seconds / max(kpb_seconds, 1e-9):.1f}x faster)")
@@ -0,0 +1,267 @@
+# keypoint_store.py
+# Content-addressed store of raw MediaPipe Holistic output. Each video is run through
+# Holistic once per extractor config; the full landmarks (pose x,y,z,visibility, all face
+# points, both hands and a per-part presence mask) are kept in
+#   <KEYPOINT_STORE>/<config id>/<sha256[:2]>/<sha256>.npz
+# (<sha256>.<start>-<end>-<max frames>.npz for callers that only need a frame window)
+# and every pipeline's feature layout is a cheap projection of that record.
+import os
+import json
+import hashlib
+from collections import deque
+
+import numpy as np
+from tqdm import tqdm
+
+from landmark_arrays import FACE_EVERY_10TH, FACE_SELECTION, HAND_POINTS, LANDMARKS_1098, POSE_POINTS, raw_landmarks
+from keypoint_format import JSON_PARTS
+from parallel_extract import ExtractionPool, EXTRACT_WORKERS
+
+STORE_PATH = os.getenv("KEYPOINT_STORE", "keypoint_store")
+RAW_FORMAT_VERSION = 1  # bump when raw_landmarks() changes what it records
+
+PARTS = ("pose", "face", "left_hand", "right_hand")
+
+
+def face_points(settings):
+    return 478 if settings.get("refine_face_landmarks") else 468
+
+
+def config_id(settings):
+    payload = json.dumps({"format": RAW_FORMAT_VERSION, "holistic": settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def window_key(digest, window):
+    """Store key of a whole video (window None) or of a (start, end, max_frames) frame window of it."""
+    if window is None:
+        return digest
+    start, end, max_frames = window
+    return f"{digest}.{start}-{end}-{max_frames}"
+
+
+def stack_frames(frames, settings):
+    """Per-frame raw_landmarks() output -> fixed-shape float32 arrays + presence mask."""
+    count = len(frames)
+    shapes = {
+        "pose": (POSE_POINTS, 4),
+        "face": (face_points(settings), 3),
+        "left_hand": (HAND_POINTS, 3),
+        "right_hand": (HAND_POINTS, 3),
+    }
+    raw = {part: np.zeros((count,) + shape, dtype=np.float32) for part, shape in shapes.items()}
+    raw["present"] = np.zeros((count, len(PARTS)), dtype=bool)
+    for t, frame in enumerate(frames):
+        for p, part in enumerate(PARTS):
+            points = frame[part]
+            if points is not None:
+                n = min(len(points), shapes[part][0])
+                raw[part][t, :n] = points[:n]
+                raw["present"][t, p] = True
+    return raw
+
+
+# ===== Projections (one per pipeline layout) =====
+
+def to_297(raw):
+    """(T, 297): pose x,y,z,visibility + FACE_SELECTION + both hands, as used by improved_collection."""
+    count = len(raw["present"])
+    return np.concatenate([
+        raw["pose"].reshape(count, -1),
+        raw["face"][:, FACE_SELECTION].reshape(count, -1),
+        raw["left_hand"].reshape(count, -1),
+        raw["right_hand"].reshape(count, -1),
+    ], axis=1)
+
+
+def to_1098(raw):
+    """(T, 1098): pose, hands and every 10th face point (x,y,z), zero padded, as used by utils/extract_landmarks."""
+    count = len(raw["present"])
+    out = np.zeros((count, LANDMARKS_1098), dtype=np.float32)
+    parts = np.concatenate([
+        raw["pose"][:, :, :3],
+        raw["left_hand"],
+        raw["right_hand"],
+        raw["face"][:, FACE_EVERY_10TH],
+    ], axis=1).reshape(count, -1)
+    out[:, :parts.shape[1]] = parts
+    return out
+
+
+def to_keypoint_parts(raw):
+    """(x,y,z data, presence) per part in the extract_keypoints part order, for keypoint_format.write()."""
+    return {part: (raw[part][:, :, :3], raw["present"][:, PARTS.index(part)]) for part in JSON_PARTS}
+
+
+def to_json_frames(raw):
+    """Per-frame {"pose", "left_hand", "right_hand", "face"} lists (empty when not detected), as written by extract_keypoints."""
+    present = raw["present"]
+    xyz = {part: raw[part][:, :, :3].tolist() for part in PARTS}
+    return [
+        {part: xyz[part][t] if present[t, PARTS.index(part)] else [] for part in JSON_PARTS}
+        for t in range(len(present))
+    ]
+
+
+# ===== Store =====
+
+class KeypointStore:
+    """
+    Looks videos up by content hash (so renamed or duplicated files are free) and
+    runs only the missing ones through an ExtractionPool, created on first use.
+    settings are the caller's Holistic kwargs; each config has its own entries.
+    File hashes are remembered by (size, mtime) so unchanged videos aren't re-read.
+    """
+
+    def __init__(self, settings, root=STORE_PATH, workers=EXTRACT_WORKERS):
+        self.settings = dict(settings)
+        self.root = os.path.join(root, config_id(self.settings))
+        self.workers = workers
+        self.lookahead = max(1, workers) * 2  # videos hashed/extracted ahead of the caller
+        self.pool = None
+        os.makedirs(self.root, exist_ok=True)
+        config_path = os.path.join(self.root, "config.json")
+        if not os.path.exists(config_path):
+            with open(config_path, "w") as f:
+                json.dump({"format": RAW_FORMAT_VERSION, "holistic": self.settings}, f, indent=2)
+
+        self.hashes_path = os.path.join(root, "hashes.json")
+        try:
+            with open(self.hashes_path, "r") as f:
+                self.hashes = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.hashes = {}
+        self.hashes_dirty = False
+
+    def digest(self, video_path):
+        path = os.path.abspath(video_path)
+        stat = os.stat(path)
+        known = self.hashes.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = file_digest(path)
+        self.hashes[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        self.hashes_dirty = True
+        return digest
+
+    def _object_path(self, key):
+        return os.path.join(self.root, key[:2], key + ".npz")
+
+    def get(self, key):
+        try:
+            with np.load(self._object_path(key)) as data:
+                return {name: data[name] for name in data.files}
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, raw):
+        path = self._object_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **raw)
+        os.replace(tmp_path, path)
+
+    def _submit(self, path, key, window):
+        if self.pool is None:
+            self.pool = ExtractionPool(raw_landmarks, self.settings, self.workers)
+        job = {"key": key, "path": path}
+        if window is not None:
+            start, end, max_frames = window
+            job.update(start=start, end=end, max_frames=max_frames, strict_window=True)
+        return self.pool.submit(job)
+
+    def load_many(self, video_paths, windows=None, desc="videos"):
+        """
+        Yields (video_path, raw, error) in input order; raw is None when the video
+        couldn't be read. windows optionally gives one (start, end, max_frames)
+        frame window per video (None for the whole video, see _extract): only
+        those frames are decoded and they are stored on their own, and a failed
+        seek or short read is an error. Videos are hashed only as they come
+        within `lookahead` of the caller, cached ones are read from the store
+        and missing ones are extracted in parallel while the caller consumes
+        the earlier results.
+        """
+        video_paths = list(video_paths)
+        pending = zip(video_paths, [None] * len(video_paths) if windows is None else windows)
+        ahead = deque()  # (path, key, error) in input order
+        running = {}  # key -> AsyncResult of its extraction
+        failed = {}  # key -> error, for repeats of content that failed
+        extracted = frames = 0
+        progress = tqdm(total=len(video_paths), desc=desc)
+
+        def look_ahead():
+            while len(ahead) < self.lookahead:
+                path, window = next(pending, (None, None))
+                if path is None:
+                    return
+                if not os.path.isfile(path):
+                    ahead.append((path, None, f"File not found: {path}"))
+                    continue
+                key = window_key(self.digest(path), window)
+                if key not in running and key not in failed and not os.path.exists(self._object_path(key)):
+                    running[key] = self._submit(path, key, window)
+                ahead.append((path, key, None))
+
+        try:
+            look_ahead()
+            while ahead:
+                path, key, error = ahead.popleft()
+                raw = None
+                if key in running:
+                    result = running.pop(key).get()
+                    error = result["error"]
+                    if error is None:
+                        raw = stack_frames(result["frames"], self.settings)
+                        self.put(key, raw)
+                        extracted += 1
+                        frames += len(result["frames"])
+                    else:
+                        failed[key] = error
+                elif key in failed:
+                    error = failed[key]
+                elif key is not None:
+                    # Cached, or the same content seen earlier in this batch
+                    raw = self.get(key)
+                    if raw is None:
+                        error = f"Missing from the keypoint store: {path}"
+                look_ahead()
+                progress.update(1)
+                progress.set_postfix(extracted=extracted, frames=frames)
+                yield path, raw, error
+        finally:
+            progress.close()
+            self.save_hashes()
+
+    def save_hashes(self):
+        if not self.hashes_dirty:
+            return
+        tmp_path = self.hashes_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.hashes, f)
+        os.replace(tmp_path, self.hashes_path)
+        self.hashes_dirty = False
+
+    def close(self):
+        self.save_hashes()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.pool is not None:
+            self.pool.pool.terminate()
+            self.pool = None
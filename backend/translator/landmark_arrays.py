@@ -0,0 +1,138 @@
+# landmark_arrays.py
+# MediaPipe results -> numpy, shared by every pipeline. Each landmark part is copied
+# with one np.fromiter over attrgetter tuples straight into a float32 buffer (a view of
+# the caller's preallocated output when one is given), and sparse face points are
+# gathered by index instead of scanning all face landmarks.
+import os
+from itertools import chain, islice
+from operator import attrgetter
+
+import numpy as np
+
+POSE_POINTS = 33
+HAND_POINTS = 21
+FACE_POINTS = 468  # 478 with refine_face_landmarks (iris points come last)
+FACE_SELECTION = [10, 33, 61, 105, 133, 152, 159, 191, 263, 291, 323, 356, 386]  # Key facial points
+FACE_EVERY_10TH = list(range(0, FACE_POINTS, 10))
+
+# 297-dim layout (improved_collection / improved_detection / training):
+# pose x,y,z,visibility | selected face x,y,z | left hand x,y,z | right hand x,y,z
+POSE_SLICE = slice(0, POSE_POINTS * 4)
+FACE_SLICE = slice(POSE_SLICE.stop, POSE_SLICE.stop + len(FACE_SELECTION) * 3)
+LEFT_HAND_SLICE = slice(FACE_SLICE.stop, FACE_SLICE.stop + HAND_POINTS * 3)
+RIGHT_HAND_SLICE = slice(LEFT_HAND_SLICE.stop, LEFT_HAND_SLICE.stop + HAND_POINTS * 3)
+KEYPOINTS_297 = RIGHT_HAND_SLICE.stop
+
+# 1098-dim layout (utils/extract_landmarks): pose, hands and every 10th face point
+# as x,y,z (122 points), zero padded to 366 * 3 values
+LANDMARKS_1098 = 366 * 3
+
+# Keypoint dtypes: every pipeline computes in float32; keypoints written to disk
+# (MP_Data frames, the packed dataset, .kpb files, utils/extract_landmarks output)
+# use KEYPOINT_DTYPE. float16 halves storage again at ~0.0005 resolution in
+# normalized image coordinates; it is not lossless, see benchmarks/check_keypoint_dtype.py
+# and the README for its measured effect on predictions.
+COMPUTE_DTYPE = np.float32
+STORAGE_DTYPES = ("float16", "float32")
+STORAGE_DTYPE = os.getenv("KEYPOINT_DTYPE", "float32")
+if STORAGE_DTYPE not in STORAGE_DTYPES:
+    raise ValueError(f"KEYPOINT_DTYPE must be one of {STORAGE_DTYPES}, got {STORAGE_DTYPE!r}")
+
+
+def for_storage(array):
+    """array in the configured KEYPOINT_DTYPE (no copy when it already is)."""
+    return np.asarray(array).astype(STORAGE_DTYPE, copy=False)
+
+
+def for_compute(array):
+    """Stored keypoints as float32 for computation (no copy when they already are)."""
+    return np.asarray(array).astype(COMPUTE_DTYPE, copy=False)
+
+
+_XYZ = attrgetter("x", "y", "z")
+_XYZV = attrgetter("x", "y", "z", "visibility")
+
+
+def fill_points(landmarks, out):
+    """
+    Copies a landmark list (results.*_landmarks or None) into out, a float32
+    (points, 3) or (points, 4) array; 4 columns include visibility. Missing
+    parts and points past the end are zeroed. Returns whether the part was found.
+    """
+    if not landmarks:
+        out[...] = 0
+        return False
+    points = landmarks.landmark
+    n = min(len(points), out.shape[0])
+    getter = _XYZV if out.shape[1] == 4 else _XYZ
+    out[:n] = np.fromiter(
+        chain.from_iterable(map(getter, islice(points, n))), dtype=np.float32, count=n * out.shape[1]
+    ).reshape(n, out.shape[1])
+    out[n:] = 0
+    return True
+
+
+def gather_points(landmarks, indices, out):
+    """x,y,z of the given landmark indices into out (len(indices), 3); zeros when missing."""
+    if not landmarks:
+        out[...] = 0
+        return False
+    points = landmarks.landmark
+    out[:] = np.fromiter(
+        chain.from_iterable(_XYZ(points[i]) for i in indices), dtype=np.float32, count=len(indices) * 3
+    ).reshape(len(indices), 3)
+    return True
+
+
+def points_array(landmarks, points, columns=3):
+    """A new (points, columns) float32 array for one part, or None when it wasn't detected."""
+    if not landmarks:
+        return None
+    out = np.empty((min(len(landmarks.landmark), points), columns), dtype=np.float32)
+    fill_points(landmarks, out)
+    return out
+
+
+def keypoints_297(results, out=None):
+    """Holistic results -> (297,) float32. Pass out to reuse a buffer across frames."""
+    if out is None:
+        out = np.empty(KEYPOINTS_297, dtype=np.float32)
+    fill_points(results.pose_landmarks, out[POSE_SLICE].reshape(POSE_POINTS, 4))
+    gather_points(results.face_landmarks, FACE_SELECTION, out[FACE_SLICE].reshape(-1, 3))
+    fill_points(results.left_hand_landmarks, out[LEFT_HAND_SLICE].reshape(HAND_POINTS, 3))
+    fill_points(results.right_hand_landmarks, out[RIGHT_HAND_SLICE].reshape(HAND_POINTS, 3))
+    return out
+
+
+def landmarks_1098(results, out=None):
+    """Holistic results -> (1098,) float32 in the utils/extract_landmarks layout."""
+    if out is None:
+        out = np.empty(LANDMARKS_1098, dtype=np.float32)
+    points = out.reshape(-1, 3)
+    fill_points(results.pose_landmarks, points[:POSE_POINTS])
+    hands = POSE_POINTS + HAND_POINTS
+    fill_points(results.left_hand_landmarks, points[POSE_POINTS:hands])
+    fill_points(results.right_hand_landmarks, points[hands:hands + HAND_POINTS])
+    face = hands + HAND_POINTS
+    gather_points(results.face_landmarks, FACE_EVERY_10TH, points[face:face + len(FACE_EVERY_10TH)])
+    points[face + len(FACE_EVERY_10TH):] = 0
+    return out
+
+
+def raw_landmarks(results):
+    """Everything Holistic returned for one frame; None for parts that weren't detected."""
+    return {
+        "pose": points_array(results.pose_landmarks, POSE_POINTS, columns=4),
+        "face": points_array(results.face_landmarks, FACE_POINTS + 10),
+        "left_hand": points_array(results.left_hand_landmarks, HAND_POINTS),
+        "right_hand": points_array(results.right_hand_landmarks, HAND_POINTS),
+    }
+
+
+def normalized_hand(hand_landmarks, out=None):
+    """One Hands-solution hand -> (21, 3) float32 with x,y relative to the wrist."""
+    if out is None:
+        out = np.empty((HAND_POINTS, 3), dtype=np.float32)
+    fill_points(hand_landmarks, out)
+    out[:, :2] -= out[0, :2].copy()
+    return out
@@ -0,0 +1,242 @@
+# packed_dataset.py
+# Packed keypoint-sequence dataset: one memory-mappable X.npy of shape (N, T, F),
+# labels in y.npy and an index.json with the label/metadata of every sample.
+# Replaces reading MP_Data/<action>/<seq>/<frame>.npy (T file opens per sequence).
+#
+# Convert an existing MP_Data folder:  python packed_dataset.py [MP_Data] [MP_Packed] [sequence_length]
+import os
+import sys
+import json
+import shutil
+import hashlib
+import time
+
+import numpy as np
+
+from landmark_arrays import STORAGE_DTYPE, for_compute
+
+PACKED_PATH = "MP_Packed"
+X_FILE = "X.npy"
+Y_FILE = "y.npy"
+INDEX_FILE = "index.json"
+PACKED_DTYPE = STORAGE_DTYPE  # KEYPOINT_DTYPE; batches are read back as float32
+STATS_DIR = "stats"  # per-split normalization stats, cached inside the packed folder
+
+
+def load_sequence_dir(sequence_path, sequence_length):
+    """Frames 0..T-1 of one MP_Data sequence as a (T, F) array, or None if a frame is missing."""
+    frames = []
+    for frame_num in range(sequence_length):
+        frame_path = os.path.join(sequence_path, f"{frame_num}.npy")
+        if not os.path.exists(frame_path):
+            return None
+        frames.append(np.load(frame_path))
+    return for_compute(frames)
+
+
+def _sequence_dirs(data_path, actions):
+    """(action, sequence name, path) for every sequence folder, in a stable order."""
+    found = []
+    for action in actions:
+        action_dir = os.path.join(data_path, action)
+        if not os.path.isdir(action_dir):
+            continue
+        names = [e.name for e in os.scandir(action_dir) if e.is_dir()]
+        for name in sorted(names, key=lambda n: (not n.isdigit(), int(n) if n.isdigit() else 0, n)):
+            found.append((action, name, os.path.join(action_dir, name)))
+    return found
+
+
+def source_fingerprint(data_path, actions, sequence_length):
+    """
+    Cheap summary of an MP_Data folder used to tell whether a packed copy is
+    out of date: per action, the number of sequence folders and the newest
+    mtime of their folder or last frame (frames are written in order).
+    One stat per sequence instead of T file reads.
+    """
+    fingerprint = {}
+    last_frame = f"{sequence_length - 1}.npy"
+    for action in actions:
+        action_dir = os.path.join(data_path, action)
+        if not os.path.isdir(action_dir):
+            continue
+        count, newest = 0, 0.0
+        for entry in os.scandir(action_dir):
+            if not entry.is_dir():
+                continue
+            count += 1
+            newest = max(newest, entry.stat().st_mtime)
+            try:
+                newest = max(newest, os.stat(os.path.join(entry.path, last_frame)).st_mtime)
+            except FileNotFoundError:
+                pass
+        fingerprint[action] = [count, newest]
+    return fingerprint
+
+
+def pack_dataset(data_path, out_path, actions, sequence_length):
+    """
+    Converts MP_Data/<action>/<seq>/<frame>.npy into the packed format.
+    Sequences with missing frames are skipped, like the training script did.
+    The output is written to a temporary folder and swapped in with two renames
+    (the old folder is moved aside, then removed). Returns the number of samples.
+    """
+    actions = list(actions)
+    label_map = {label: num for num, label in enumerate(actions)}
+    fingerprint = source_fingerprint(data_path, actions, sequence_length)
+
+    # First pass: find complete sequences without loading them
+    complete = [
+        (action, name, path) for action, name, path in _sequence_dirs(data_path, actions)
+        if os.path.exists(os.path.join(path, f"{sequence_length - 1}.npy"))
+    ]
+    if not complete:
+        raise ValueError(f"No complete sequences found under {data_path}")
+    num_features = np.load(os.path.join(complete[0][2], "0.npy")).shape[-1]
+
+    tmp_path = out_path.rstrip("/\\") + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    # Second pass: fill the memory-mapped array in place, one sequence at a time
+    X = np.lib.format.open_memmap(
+        os.path.join(tmp_path, X_FILE), mode="w+", dtype=PACKED_DTYPE,
+        shape=(len(complete), sequence_length, num_features),
+    )
+    samples = []
+    for action, name, path in complete:
+        sequence = load_sequence_dir(path, sequence_length)
+        if sequence is None or sequence.shape != (sequence_length, num_features):
+            continue
+        X[len(samples)] = sequence
+        samples.append({"action": action, "label": label_map[action], "source": f"{action}/{name}"})
+    X.flush()
+    del X
+
+    count = len(samples)
+    if count < len(complete):
+        # Drop the unused tail rows left by skipped sequences
+        full = np.load(os.path.join(tmp_path, X_FILE), mmap_mode="r")
+        np.save(os.path.join(tmp_path, "X_trimmed.npy"), full[:count])
+        del full
+        os.replace(os.path.join(tmp_path, "X_trimmed.npy"), os.path.join(tmp_path, X_FILE))
+
+    np.save(os.path.join(tmp_path, Y_FILE), np.array([s["label"] for s in samples], dtype=np.int32))
+    with open(os.path.join(tmp_path, INDEX_FILE), "w") as f:
+        json.dump({
+            "actions": actions,
+            "sequence_length": sequence_length,
+            "num_features": int(num_features),
+            "dtype": np.dtype(PACKED_DTYPE).name,
+            "count": count,
+            "source": os.path.abspath(data_path),
+            "source_fingerprint": fingerprint,
+            "created_at": time.time(),
+            "samples": samples,
+        }, f)
+
+    # Move the old folder aside instead of deleting it first, so out_path is only
+    # missing between two renames and an interrupted pack keeps the old dataset
+    old_path = out_path.rstrip("/\\") + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(out_path):
+        os.replace(out_path, old_path)
+    os.replace(tmp_path, out_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return count
+
+
+def load_index(packed_path):
+    with open(os.path.join(packed_path, INDEX_FILE), "r") as f:
+        return json.load(f)
+
+
+def load_packed(packed_path=PACKED_PATH, mmap=True):
+    """Returns (X, y, index). With mmap=True, X is a read-only memory map (no copy)."""
+    mode = "r" if mmap else None
+    X = np.load(os.path.join(packed_path, X_FILE), mmap_mode=mode)
+    y = np.load(os.path.join(packed_path, Y_FILE))
+    return X, y, load_index(packed_path)
+
+
+def _welford_merge(count, mean, m2, chunk):
+    """Chan et al. pairwise update of running per-feature (count, mean, M2) with a 2-D chunk."""
+    chunk_count = len(chunk)
+    chunk_mean = chunk.mean(axis=0)
+    chunk_m2 = ((chunk - chunk_mean) ** 2).sum(axis=0)
+    total = count + chunk_count
+    delta = chunk_mean - mean
+    mean = mean + delta * (chunk_count / total)
+    m2 = m2 + chunk_m2 + delta ** 2 * (count * chunk_count / total)
+    return total, mean, m2
+
+
+def compute_feature_stats(X, rows, chunk_rows=256):
+    """
+    Per-feature mean and (population) std over every frame of X[rows], in one
+    pass of chunk_rows sequences at a time, so memory stays bounded for any
+    dataset size. Accumulates in float64.
+    """
+    rows = np.sort(np.asarray(rows))
+    count, mean, m2 = 0, np.zeros(X.shape[-1]), np.zeros(X.shape[-1])
+    for start in range(0, len(rows), chunk_rows):
+        chunk = np.asarray(X[rows[start:start + chunk_rows]], dtype=np.float64).reshape(-1, X.shape[-1])
+        count, mean, m2 = _welford_merge(count, mean, m2, chunk)
+    return mean, np.sqrt(m2 / max(count, 1))
+
+
+def feature_stats(packed_path, X, rows):
+    """
+    compute_feature_stats() for a split of the packed dataset, cached in
+    <packed_path>/stats/ by the split's rows. Repacking replaces the folder,
+    so cached stats never outlive the data they were computed from.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    key = hashlib.sha256(np.sort(rows).tobytes()).hexdigest()[:16]
+    cache_path = os.path.join(packed_path, STATS_DIR, f"{key}.npz")
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return cached["mean"], cached["std"]
+
+    mean, std = compute_feature_stats(X, rows)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, mean=mean, std=std, count=len(rows))
+    os.replace(tmp_path, cache_path)
+    return mean, std
+
+
+def is_up_to_date(packed_path, data_path, actions, sequence_length):
+    if not os.path.exists(os.path.join(packed_path, INDEX_FILE)):
+        return False
+    index = load_index(packed_path)
+    return (
+        index["actions"] == list(actions)
+        and index["sequence_length"] == sequence_length
+        and index.get("dtype") == np.dtype(PACKED_DTYPE).name
+        and index["source_fingerprint"] == source_fingerprint(data_path, actions, sequence_length)
+    )
+
+
+def load_or_pack(data_path, packed_path, actions, sequence_length, mmap=True):
+    """Loads the packed dataset, (re)building it first if MP_Data changed since it was packed."""
+    if not is_up_to_date(packed_path, data_path, actions, sequence_length):
+        if os.path.isdir(data_path):
+            start = time.perf_counter()
+            count = pack_dataset(data_path, packed_path, actions, sequence_length)
+            print(f"📦 Packed {count} sequences into {packed_path} in {time.perf_counter() - start:.1f}s")
+        elif not os.path.exists(os.path.join(packed_path, INDEX_FILE)):
+            raise FileNotFoundError(f"Neither {packed_path} nor {data_path} exists")
+    return load_packed(packed_path, mmap=mmap)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "MP_Data"
+    target = sys.argv[2] if len(sys.argv) > 2 else PACKED_PATH
+    length = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    actions = sorted(e.name for e in os.scandir(source) if e.is_dir())
+    start = time.perf_counter()
+    count = pack_dataset(source, target, actions, length)
+    print(f"✅ Packed {count} sequences ({len(actions)} actions, {length} frames) into {target} "
+          f"in {time.perf_counter() - start:.1f}s")
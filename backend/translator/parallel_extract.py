@@ -0,0 +1,158 @@
+# parallel_extract.py
+# Multi-process MediaPipe Holistic extraction over many videos.
+# Each worker process builds one Holistic graph at startup and reuses it for every
+# video it gets; idle workers pull the next video from the shared task queue, and
+# results are yielded in input order so callers can write outputs deterministically.
+import os
+import time
+from collections import deque
+from multiprocessing import Pool
+
+import cv2
+from tqdm import tqdm
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", os.cpu_count() or 1))
+
+
+# ===== Worker side =====
+
+_holistic = None
+_frame_fn = None
+
+
+def _init_worker(holistic_kwargs, frame_fn):
+    global _holistic, _frame_fn
+    import mediapipe as mp
+
+    # One core per worker: parallelism comes from the processes, not OpenCV threads
+    cv2.setNumThreads(1)
+    _holistic = mp.solutions.holistic.Holistic(**holistic_kwargs)
+    _frame_fn = frame_fn
+
+
+def _extract(job):
+    """
+    job: {"key", "path", "start"=0, "end"=None, "max_frames"=None, "strict_window"=False}.
+    Reads frames [start, end) (at most max_frames) and converts each one.
+    With strict_window=True a failed seek or a short read is reported as an error,
+    matching what improved_collection used to skip.
+    """
+    started = time.perf_counter()
+    result = {"key": job["key"], "frames": [], "error": None}
+    path = job["path"]
+    if not os.path.isfile(path):
+        result["error"] = f"File not found: {path}"
+        return result
+
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            result["error"] = f"Could not open {path}"
+            return result
+
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        start = job.get("start") or 0
+        end = job.get("end")
+        if end is None or end <= 0 or end > total_frames:
+            end = total_frames
+        if job.get("strict_window") and start >= end:
+            result["error"] = f"Invalid frame range ({start}-{end})"
+            return result
+
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            actual_start = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            if job.get("strict_window") and actual_start != start:
+                result["error"] = f"Seek failed ({actual_start} vs {start})"
+                return result
+
+        # A video must not inherit tracking state from the previous one
+        if hasattr(_holistic, "reset"):
+            _holistic.reset()
+
+        wanted = end - start if end > 0 else None
+        if job.get("max_frames") is not None:
+            wanted = job["max_frames"] if wanted is None else min(wanted, job["max_frames"])
+
+        while wanted is None or len(result["frames"]) < wanted:
+            ok, frame = cap.read()
+            if not ok:
+                if job.get("strict_window") and wanted is not None:
+                    result["error"] = "Frame read error"
+                break
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            result["frames"].append(_frame_fn(_holistic.process(image)))
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        cap.release()
+        result["seconds"] = time.perf_counter() - started
+    return result
+
+
+# ===== Driver =====
+
+class ExtractionPool:
+    """
+    Long-lived pool of Holistic workers. map() streams results in the order
+    of the jobs while workers pull videos one at a time, so a long video on one
+    worker never holds up the others. Only a few videos per worker are in
+    flight, so a caller that stops early wastes little work and memory.
+    """
+
+    def __init__(self, frame_fn, holistic_kwargs=None, workers=EXTRACT_WORKERS):
+        self.workers = max(1, workers)
+        self.pool = Pool(self.workers, initializer=_init_worker, initargs=(holistic_kwargs or {}, frame_fn))
+
+    def submit(self, job):
+        """Queues one job; the returned AsyncResult's get() gives its result."""
+        return self.pool.apply_async(_extract, (job,))
+
+    def map(self, jobs, desc="videos"):
+        jobs = list(jobs)
+        frames = errors = 0
+        started = time.perf_counter()
+        progress = tqdm(total=len(jobs), desc=desc)
+        remaining = iter(jobs)
+        in_flight = deque()
+
+        def submit():
+            job = next(remaining, None)
+            if job is not None:
+                in_flight.append(self.submit(job))
+
+        for _ in range(self.workers * 2):
+            submit()
+        try:
+            while in_flight:
+                result = in_flight.popleft().get()
+                submit()
+                frames += len(result["frames"])
+                errors += result["error"] is not None
+                progress.update(1)
+                elapsed = time.perf_counter() - started
+                progress.set_postfix(fps=f"{frames / elapsed:.1f}" if elapsed else "-")
+                yield result
+        finally:
+            progress.close()
+            elapsed = time.perf_counter() - started
+            if jobs and elapsed:
+                print(
+                    f"⏱️ {desc}: {progress.n} videos, {frames} frames in {elapsed:.1f}s "
+                    f"({progress.n / elapsed:.2f} videos/s, {frames / elapsed:.1f} frames/s, "
+                    f"{self.workers} workers, {errors} errors)"
+                )
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.pool.terminate()
@@ -1,18 +1,26 @@
+import os
 import socket
 import json
 import time
 
+from keypoint_format import load_frames
+
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 IP = "127.0.0.1"
 PORT = 5005
 
-with open("simplified/-1SxWYSJKac.json") as f:
-    frames = json.load(f)
+# Prefer the compact binary file, fall back to the JSON one
+SOURCE = "simplified/-1SxWYSJKac.kpb"
+if not os.path.exists(SOURCE):
+    SOURCE = "simplified/-1SxWYSJKac.json"
+frames = load_frames(SOURCE)
+
+# The receiver expects one JSON object per datagram: encode every frame once, not on every send
+payloads = [json.dumps(frame).encode() for frame in frames]
 
 print(f"🚀 Sending {len(frames)} frames in a loop to {IP}:{PORT}")
 
 while True:
-    for frame in frames:
-        data = json.dumps(frame).encode()
+    for data in payloads:
         sock.sendto(data, (IP, PORT))
         time.sleep(1/30)  # Send at ~30 FPS
@@ -1,10 +1,31 @@
 import os
+import sys
 import json
+import hashlib
+import time
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import keypoint_format
+from landmark_arrays import HAND_POINTS, STORAGE_DTYPE
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wlasl_stream import iter_json_array
 
 # 🔁 Your source and destination folders
-INPUT_FOLDER = "./keypoints"         # where your original 2000 JSONs are
+INPUT_FOLDER = "./keypoints"         # where your original 2000 keypoint files are (.kpb or .json)
 OUTPUT_FOLDER = "./simplified"       # where to save new simplified ones
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+MANIFEST_FILE = ".manifest.json"     # in OUTPUT_FOLDER: source size/mtime/hash of every output
+
+# "kpb" (compact binary, see keypoint_format.py) or "json"
+OUTPUT_FORMAT = os.getenv("KEYPOINT_FORMAT", "kpb")
+OUTPUT_DTYPE = STORAGE_DTYPE  # KEYPOINT_DTYPE: float32 or float16
+SIMPLIFY_WORKERS = int(os.getenv("SIMPLIFY_WORKERS", os.cpu_count() or 1))
+# Simplify JSON sources STREAM_CHUNK frames at a time while reading them instead of loading whole files
+STREAM = os.getenv("SIMPLIFY_STREAM", "0") == "1"
+STREAM_CHUNK = 256
 
 # Pose joints to keep (MediaPipe indices)
 POSE_MAP = {
@@ -16,45 +37,179 @@ POSE_MAP = {
     "right_wrist": 16
 }
 
-def simplify_frame(frame):
+META = {"joints": {"pose": list(POSE_MAP)}}
+
+# Outputs made with different settings are not reused
+SETTINGS = {"pose_map": POSE_MAP, "format": OUTPUT_FORMAT, "dtype": OUTPUT_DTYPE, "stream": STREAM}
+
+
+def read_parts(file_path):
+    """
+    Parts of a .kpb or extract_keypoints .json file as {name: (data, present)}.
+    JSON values are kept in float64, so JSON output matches the source values.
+    """
+    if file_path.endswith(keypoint_format.EXTENSION):
+        return {name: (part.data, part.present) for name, part in keypoint_format.read(file_path).parts.items()}
+    with open(file_path) as f:
+        parts, _ = keypoint_format.parts_from_json_frames(json.load(f), dtype=np.float64)
+    return parts
+
+
+def _points(data, points):
+    """(T, points, 3) view or zero-padded copy of data, so every chunk of a file has the same shape."""
+    if data.shape[1] == points:
+        return data
+    fixed = np.zeros((len(data), points, 3), dtype=data.dtype)
+    fixed[:, :min(points, data.shape[1])] = data[:, :points, :3]
+    return fixed
+
+
+def simplify_parts(parts):
+    """Named arm joints from the pose (zeros when missing) plus both hands as they are."""
+    frames = len(next(iter(parts.values()))[0]) if parts else 0
+    dtype = next(iter(parts.values()))[0].dtype if parts else np.float32
+    pose, _ = parts.get("pose", (np.zeros((frames, 0, 3), dtype=dtype), None))
+    joints = np.zeros((frames, len(POSE_MAP), 3), dtype=dtype)
+    for j, idx in enumerate(POSE_MAP.values()):
+        if idx < pose.shape[1]:
+            joints[:, j] = pose[:, idx, :3]
+
+    simplified = {"pose": (joints, np.ones(frames, dtype=bool))}
+    for hand in ("left_hand", "right_hand"):
+        data, present = parts.get(hand, (np.zeros((frames, 0, 3), dtype=dtype), np.zeros(frames, dtype=bool)))
+        simplified[hand] = (_points(data, HAND_POINTS), present)
+    return simplified
+
+
+def iter_simplified_chunks(file_path):
+    """JSON source only: simplify_parts() over STREAM_CHUNK source frames at a time."""
+    frames = (frame for frame, _ in iter_json_array(file_path))
+    while True:
+        chunk = list(islice(frames, STREAM_CHUNK))
+        if not chunk:
+            return
+        parts, _ = keypoint_format.parts_from_json_frames(chunk, dtype=np.float64)
+        yield simplify_parts(parts)
+
+
+def write_json(output_path, chunks):
+    """Writes simplified parts chunks as one JSON array of frames, one chunk in memory at a time."""
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write("[")
+        separator = ""
+        for simplified in chunks:
+            for frame in keypoint_format.parts_to_json_frames(simplified, META):
+                f.write(separator + json.dumps(frame))
+                separator = ", "
+        f.write("]")
+    os.replace(tmp_path, output_path)
+
+
+def simplify_file(file_path, output_path, stream=STREAM):
+    if stream and file_path.endswith(".json"):
+        chunks = iter_simplified_chunks(file_path)
+    else:
+        chunks = [simplify_parts(read_parts(file_path))]
+
+    if OUTPUT_FORMAT == "json":
+        write_json(output_path, chunks)
+        return
+    # Simplified frames are small (6 joints + hands), so the columnar write joins the chunks
+    chunks = list(chunks) or [simplify_parts({})]
     simplified = {
-        "pose": {},
-        "left_hand": frame.get("left_hand", []),
-        "right_hand": frame.get("right_hand", [])
+        name: (np.concatenate([c[name][0] for c in chunks]), np.concatenate([c[name][1] for c in chunks]))
+        for name in chunks[0]
     }
+    keypoint_format.write(output_path, simplified, OUTPUT_DTYPE, META)
 
-    pose = frame.get("pose", [])
-    for name, idx in POSE_MAP.items():
-        if idx < len(pose):
-            simplified["pose"][name] = pose[idx]
-        else:
-            simplified["pose"][name] = [0, 0, 0]
-    return simplified
 
-def simplify_file(file_path, output_path):
-    with open(file_path) as f:
-        data = json.load(f)
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
-    simplified_data = [simplify_frame(frame) for frame in data]
+def _simplify_job(job):
+    """Runs in a worker process; returns (filename, digest, error)."""
+    filename, input_path, output_path = job
+    try:
+        digest = file_digest(input_path)
+        simplify_file(input_path, output_path)
+        return filename, digest, None
+    except Exception as e:
+        return filename, None, str(e)
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(OUTPUT_FOLDER, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"settings": SETTINGS, "files": {}}
+    if manifest.get("settings") != json.loads(json.dumps(SETTINGS)):
+        return {"settings": SETTINGS, "files": {}}
+    return manifest
+
+
+def save_manifest(manifest):
+    path = os.path.join(OUTPUT_FOLDER, MANIFEST_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(path + ".tmp", path)
 
-    with open(output_path, "w") as f:
-        json.dump(simplified_data, f, indent=2)
 
 def batch_process():
-    files = [f for f in os.listdir(INPUT_FOLDER) if f.endswith(".json")]
-    print(f"🔄 Processing {len(files)} files...")
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    files = sorted(f for f in os.listdir(INPUT_FOLDER) if f.endswith((".json", keypoint_format.EXTENSION)))
+    extension = ".json" if OUTPUT_FORMAT == "json" else keypoint_format.EXTENSION
+    manifest = load_manifest()
+    known = manifest["files"]
 
+    # Skip sources whose size and mtime (or, if only touched, content hash) are unchanged
+    jobs, unchanged = [], 0
     for filename in files:
         input_path = os.path.join(INPUT_FOLDER, filename)
-        output_path = os.path.join(OUTPUT_FOLDER, filename)
-        try:
-            simplify_file(input_path, output_path)
-        except Exception as e:
-            print(f"❌ Failed to process {filename}: {e}")
-        else:
-            print(f"✅ {filename}")
-
-    print("✅ All files processed.")
+        output_path = os.path.join(OUTPUT_FOLDER, os.path.splitext(filename)[0] + extension)
+        stat = os.stat(input_path)
+        entry = known.get(filename)
+        if entry and os.path.exists(output_path):
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                unchanged += 1
+                continue
+            if entry["size"] == stat.st_size and entry["sha256"] == file_digest(input_path):
+                entry["mtime_ns"] = stat.st_mtime_ns
+                unchanged += 1
+                continue
+        known[filename] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None}
+        jobs.append((filename, input_path, output_path))
+
+    for filename in set(known) - set(files):
+        del known[filename]
+    print(f"🔄 Processing {len(jobs)} files ({unchanged} unchanged)...")
+
+    start = time.perf_counter()
+    failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, SIMPLIFY_WORKERS)) as pool:
+            for filename, digest, error in pool.map(_simplify_job, jobs, chunksize=8):
+                if error:
+                    failed += 1
+                    del known[filename]
+                    print(f"❌ Failed to process {filename}: {error}")
+                else:
+                    known[filename]["sha256"] = digest
+                    print(f"✅ {filename}")
+    finally:
+        # Only finished files are recorded, so an interrupted run resumes where it stopped
+        for filename, _, _ in jobs:
+            if filename in known and known[filename]["sha256"] is None:
+                del known[filename]
+        save_manifest(manifest)
+
+    print(f"✅ All files processed in {time.perf_counter() - start:.1f}s ({failed} failed).")
 
 if __name__ == "__main__":
     batch_process()
@@ -0,0 +1,218 @@
+# training_pipeline.py
+# tf.data input pipeline for improved_training with augmentation done on the fly:
+# every epoch sees fresh temporal + spatial augmentations of the real sequences
+# instead of a fixed set of augmented copies written to MP_Data by the collector.
+#
+# Each batch is built from (seed, epoch, step) alone — its own RNG stream, so results
+# don't depend on which worker ran it or in what order. Augmentation is Python/NumPy
+# code that holds the GIL, so batches are built in a BatchPool of worker processes
+# (not tf.data threads) and handed to tf.data in order, prefetched while the model trains.
+import os
+import math
+import multiprocessing
+from collections import deque
+
+import numpy as np
+import tensorflow as tf
+
+from augmentation import augment_batch
+
+AUGMENT_WORKERS = int(os.getenv("AUGMENT_WORKERS", os.cpu_count() or 1))
+AUGMENT_PROB = 0.5  # share of real sequences replaced by an augmented copy each epoch
+# Same mix of strengths improved_collection used for the copies it wrote to disk
+STRENGTH_WEIGHTS = {"light": 0.4, "medium": 0.4, "heavy": 0.2}
+
+
+def balanced_epoch(classes, rng):
+    """
+    Shuffled sample indices for one epoch, with every class topped up to the
+    size of the largest one by resampling (the collector used to fill each action
+    to no_sequences with augmented copies). Returns (indices, is_extra).
+    """
+    counts = np.bincount(classes)
+    indices, extra = [], []
+    for label, count in enumerate(counts):
+        members = np.flatnonzero(classes == label)
+        if count == 0:
+            continue
+        indices.append(members)
+        extra.append(np.zeros(count, dtype=bool))
+        if count < counts.max():
+            indices.append(rng.choice(members, size=counts.max() - count))
+            extra.append(np.ones(counts.max() - count, dtype=bool))
+    indices, extra = np.concatenate(indices), np.concatenate(extra)
+    order = rng.permutation(len(indices))
+    return indices[order], extra[order]
+
+
+def read_rows(X, rows):
+    """X[rows] as float32, read in file order (X may be a memory map) and returned in the given order."""
+    by_row = np.argsort(rows, kind="stable")
+    batch = np.empty((len(rows),) + X.shape[1:], dtype=np.float32)
+    batch[by_row] = X[rows[by_row]]
+    return batch
+
+
+class BatchMaker:
+    """
+    Builds training batch `step` (counted across epochs) as normalized float32
+    arrays from the rows of the .npy file at x_path listed in `rows` (all rows by
+    default). X is opened as a memory map and only the rows of one batch are read,
+    so it can be larger than RAM. Picklable: worker processes reopen X from the path.
+    """
+
+    def __init__(self, x_path, y, mean, std, rows=None, batch_size=32, seed=0, augment_prob=AUGMENT_PROB):
+        self.x_path = x_path
+        self._X = None
+        self.rows = np.arange(len(self.X)) if rows is None else np.asarray(rows)
+        self.y = np.asarray(y, dtype=np.float32)[self.rows]
+        self.classes = self.y.argmax(axis=1)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = (1 / (np.asarray(std) + 1e-8)).astype(np.float32)
+        self.batch_size = batch_size
+        self.seed = seed
+        self.augment_prob = augment_prob
+        epoch_size = int(np.bincount(self.classes).max()) * int(np.count_nonzero(np.bincount(self.classes)))
+        self.steps_per_epoch = math.ceil(epoch_size / batch_size)
+        self.strengths = list(STRENGTH_WEIGHTS)
+        self.strength_p = list(STRENGTH_WEIGHTS.values())
+        self._plans = {}
+
+    @property
+    def X(self):
+        if self._X is None:
+            self._X = np.load(self.x_path, mmap_mode="r")
+        return self._X
+
+    def __getstate__(self):
+        # Send the path, not the memory map; plans are cheap to recompute
+        return {**self.__dict__, "_X": None, "_plans": {}}
+
+    def plan(self, epoch):
+        # Recomputing is cheap and deterministic, so concurrent workers may race here safely
+        plan = self._plans.get(epoch)
+        if plan is None:
+            plan = balanced_epoch(self.classes, np.random.default_rng([self.seed, epoch]))
+            self._plans = {epoch: plan, **{e: p for e, p in self._plans.items() if e >= epoch - 1}}
+        return plan
+
+    def __call__(self, step):
+        epoch, index = divmod(int(step), self.steps_per_epoch)
+        order, extra = self.plan(epoch)
+        batch_slice = slice(index * self.batch_size, (index + 1) * self.batch_size)
+        indices, is_extra = order[batch_slice], extra[batch_slice]
+
+        rng = np.random.default_rng([self.seed, epoch, index, 1])
+        batch = read_rows(self.X, self.rows[indices])
+        # Top-up copies are always augmented, real sequences with augment_prob
+        augment = is_extra | (rng.random(len(indices)) < self.augment_prob)
+        if augment.any():
+            strengths = rng.choice(self.strengths, size=int(augment.sum()), p=self.strength_p)
+            batch[augment] = augment_batch(batch[augment], strengths, rng)
+        return (batch - self.mean) * self.scale, self.y[indices]
+
+
+_make_batch = None  # worker side of BatchPool
+
+
+def _init_batch_worker(make_batch):
+    global _make_batch
+    _make_batch = make_batch
+
+
+def _worker_batch(step):
+    return _make_batch(step)
+
+
+def _start_method():
+    # Never fork a process that may be running TF threads; fork isn't available on Windows anyway
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class BatchPool:
+    """
+    Worker processes that build make_batch(step). Start it before TF/Keras builds
+    anything and close it (or use it as a context manager) when training is done.
+    Workers import the main script, so it must keep its work behind a
+    `if __name__ == "__main__":` guard. With workers <= 1 batches are built in-process.
+    """
+
+    def __init__(self, make_batch, workers=AUGMENT_WORKERS):
+        self.make_batch = make_batch
+        self.workers = workers
+        self.pool = None
+        if workers > 1:
+            self.pool = multiprocessing.get_context(_start_method()).Pool(
+                workers, initializer=_init_batch_worker, initargs=(make_batch,)
+            )
+
+    def iter_batches(self, steps):
+        """Yields make_batch(step) for step in 0..steps-1, in order, at most two per worker ahead of the consumer."""
+        if self.pool is None:
+            for step in range(steps):
+                yield self.make_batch(step)
+            return
+
+        remaining = iter(range(steps))
+        in_flight = deque()
+
+        def submit():
+            step = next(remaining, None)
+            if step is not None:
+                in_flight.append(self.pool.apply_async(_worker_batch, (step,)))
+
+        for _ in range(self.workers * 2):
+            submit()
+        while in_flight:
+            batch = in_flight.popleft().get()
+            submit()
+            yield batch
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _dataset(batches, sequence_length, num_features, num_classes):
+    signature = (
+        tf.TensorSpec((None, sequence_length, num_features), tf.float32),
+        tf.TensorSpec((None, num_classes), tf.float32),
+    )
+    return tf.data.Dataset.from_generator(batches, output_signature=signature).prefetch(tf.data.AUTOTUNE)
+
+
+def make_train_dataset(batch_pool, epochs):
+    """
+    Returns (dataset, steps_per_epoch) for model.fit(dataset, epochs=epochs,
+    steps_per_epoch=steps_per_epoch), with the batches of batch_pool's BatchMaker.
+    """
+    make_batch = batch_pool.make_batch
+    steps = make_batch.steps_per_epoch * epochs
+    dataset = _dataset(lambda: batch_pool.iter_batches(steps), *make_batch.X.shape[1:], make_batch.y.shape[1])
+    return dataset, make_batch.steps_per_epoch
+
+
+def make_eval_dataset(X, y, mean, std, rows, batch_size=32):
+    """
+    Normalized, unaugmented batches of X[rows] in order (for validation/test),
+    streamed like training. Reading is cheap, so they are built in-process.
+    """
+    rows = np.asarray(rows)
+    y = np.asarray(y, dtype=np.float32)
+    mean = np.asarray(mean, dtype=np.float32)
+    scale = (1 / (np.asarray(std) + 1e-8)).astype(np.float32)
+
+    def batches():
+        for start in range(0, len(rows), batch_size):
+            batch_rows = rows[start:start + batch_size]
+            yield (read_rows(X, batch_rows) - mean) * scale, y[batch_rows]
+
+    return _dataset(batches, *X.shape[1:], y.shape[1])
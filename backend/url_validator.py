@@ -0,0 +1,151 @@
+# url_validator.py
+# Asyncio URL checker for the flashcard import with a persistent result cache,
+# so re-imports only re-check URLs that are new or whose result has expired.
+import os
+import re
+import time
+import random
+import sqlite3
+import asyncio
+from urllib.parse import urlsplit
+
+import httpx
+
+CACHE_PATH = os.getenv("URL_CACHE_PATH", "url_cache.sqlite3")
+VALID_TTL = int(os.getenv("URL_CACHE_VALID_TTL", 30 * 24 * 3600))     # re-check good URLs monthly
+INVALID_TTL = int(os.getenv("URL_CACHE_INVALID_TTL", 3 * 24 * 3600))  # retry bad ones sooner
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class URLCache:
+    """sqlite-backed url -> (valid, status, checked_at) store."""
+
+    def __init__(self, path=CACHE_PATH, valid_ttl=VALID_TTL, invalid_ttl=INVALID_TTL):
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS url_checks ("
+            " url TEXT PRIMARY KEY, valid INTEGER NOT NULL, status INTEGER, checked_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def fresh_results(self, urls, now=None):
+        """Returns {url: valid} for URLs whose cached result hasn't expired."""
+        now = now or time.time()
+        results = {}
+        urls = list(urls)
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT url, valid, checked_at FROM url_checks WHERE url IN ({placeholders})", chunk
+            )
+            for url, valid, checked_at in rows:
+                ttl = self.valid_ttl if valid else self.invalid_ttl
+                if now - checked_at < ttl:
+                    results[url] = bool(valid)
+        return results
+
+    def store(self, results):
+        """results: iterable of (url, valid, status)."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO url_checks (url, valid, status, checked_at) VALUES (?, ?, ?, ?)",
+            [(url, int(valid), status, now) for url, valid, status in results],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+async def check_url(client, url, retries=2, backoff=0.5):
+    """
+    HEAD the URL, falling back to a GET (headers only) when HEAD isn't allowed.
+    Network errors and 429/5xx are retried up to `retries` times.
+    Returns (valid, status) where status is None if the server never answered.
+    """
+    if not re.match(r"^https?://", url):
+        return False, None
+
+    status = None
+    for attempt in range(retries + 1):
+        try:
+            response = await client.head(url, follow_redirects=True)
+            status = response.status_code
+            if status == 200:
+                return True, status
+            if status not in RETRYABLE_STATUS:
+                async with client.stream("GET", url, follow_redirects=True) as response:
+                    status = response.status_code
+                if status == 200:
+                    return True, status
+                if status not in RETRYABLE_STATUS:
+                    return False, status
+        except httpx.HTTPError:
+            pass
+        if attempt < retries:
+            await asyncio.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+    return False, status
+
+
+async def validate_async(
+    urls,
+    cache: URLCache,
+    per_host=8,
+    max_connections=64,
+    timeout=5.0,
+    retries=2,
+    flush_every=500,
+    transport=None,
+    progress_every=1000,
+):
+    """Returns the set of valid URLs, checking only those without a fresh cache entry."""
+    urls = list(dict.fromkeys(urls))
+    cached = cache.fresh_results(urls)
+    valid = {url for url, ok in cached.items() if ok}
+    pending = [url for url in urls if url not in cached]
+    print(f"🗃️ {len(cached)} URLs answered from cache, {len(pending)} to check")
+    if not pending:
+        return valid
+
+    host_limits = {}
+    results = []
+    done = 0
+
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, transport=transport) as client:
+        global_limit = asyncio.Semaphore(max_connections)
+
+        async def worker(url):
+            nonlocal done
+            host = urlsplit(url).hostname or ""
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+            async with host_limit, global_limit:
+                ok, status = await check_url(client, url, retries=retries)
+            if ok:
+                valid.add(url)
+            results.append((url, ok, status))
+            done += 1
+            if len(results) >= flush_every:
+                cache.store(results)
+                results.clear()
+            if done % progress_every == 0:
+                print(f"🔎 Checked {done}/{len(pending)} URLs so far...")
+
+        await asyncio.gather(*(worker(url) for url in pending))
+
+    if results:
+        cache.store(results)
+    return valid
+
+
+def validate_urls(urls, cache_path=CACHE_PATH, **kwargs):
+    """Blocking wrapper for scripts."""
+    cache = URLCache(cache_path)
+    try:
+        return asyncio.run(validate_async(urls, cache, **kwargs))
+    finally:
+        cache.close()
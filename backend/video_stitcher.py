@@ -0,0 +1,218 @@
+# video_stitcher.py
+# Renders a gloss sequence into one normalized video (ffmpeg concat) and keeps the
+# results in a size-bounded LRU disk cache, so popular sentences are a single download.
+import hashlib
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+
+import metrics
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+CLIP_DIR = os.getenv("FLASHCARD_CLIP_DIR", "flashcards")  # <stored gloss>.mp4, see learning_module/download_flashcards.py
+CLIP_CACHE_DIR = os.getenv("CLIP_CACHE_DIR", "clip_cache")  # flashcard videos fetched on first use
+STITCH_CACHE_DIR = os.getenv("STITCH_CACHE_DIR", "stitched_cache")
+STITCH_CACHE_MAX_BYTES = int(os.getenv("STITCH_CACHE_MAX_MB", 2048)) * 1024 * 1024
+RENDER_WORKERS = int(os.getenv("STITCH_RENDER_WORKERS", 2))
+FAILED_RETRY_AFTER = 300  # seconds before a failed sequence is rendered again
+
+# Every clip is scaled/padded to this size and frame rate before concatenation
+OUTPUT_WIDTH = 640
+OUTPUT_HEIGHT = 480
+OUTPUT_FPS = 25
+
+DOWNLOAD_TIMEOUT = 10
+RENDER_TIMEOUT = 300
+
+metrics.describe("stitch_cache_hits_total", "counter", "Stitched videos served from the disk cache")
+metrics.describe("stitch_renders_total", "counter", "Stitched video renders by result")
+metrics.describe("stitch_evictions_total", "counter", "Stitched videos evicted from the disk cache")
+
+
+def sequence_key(clips) -> str:
+    """
+    Cache key of a rendered sequence of (flashcard_id, gloss, video_url) clips: the
+    matched flashcards, not the requested spelling; a re-imported clip URL gives a new key.
+    """
+    parts = "\x1f".join(f"{flashcard_id}\x1e{video_url}" for flashcard_id, _, video_url in clips)
+    return hashlib.sha256(parts.encode("utf-8")).hexdigest()[:32]
+
+
+# ------------------ worker side ------------------
+
+def _local_clip(gloss, video_url):
+    """
+    Path of a local clip for the flashcard with this stored gloss, downloading it
+    into CLIP_CACHE_DIR if needed.
+    """
+    named = os.path.join(CLIP_DIR, f"{gloss}.mp4")
+    if os.path.exists(named):
+        return named
+
+    if "youtube" in video_url or "youtu.be" in video_url or video_url.endswith(".swf"):
+        return None  # not directly downloadable / not decodable as a clip
+
+    ext = os.path.splitext(video_url.split("?")[0])[1] or ".mp4"
+    cached = os.path.join(CLIP_CACHE_DIR, hashlib.sha1(video_url.encode("utf-8")).hexdigest() + ext)
+    if os.path.exists(cached):
+        return cached
+
+    os.makedirs(CLIP_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cached}.{os.getpid()}.tmp"
+    try:
+        with requests.get(video_url, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+            r.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in r.iter_content(chunk_size=65536):
+                    f.write(chunk)
+        os.replace(tmp_path, cached)
+        return cached
+    except (requests.RequestException, OSError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+
+def render_sequence(clips, output_path):
+    """
+    Runs in a worker process. clips is a list of (flashcard_id, gloss, video_url);
+    clips that can't be fetched are skipped. Returns the number of clips in the output.
+    """
+    paths = [p for p in (_local_clip(gloss, url) for _, gloss, url in clips) if p]
+    if not paths:
+        raise RuntimeError("No clips available for this sequence")
+
+    inputs, filters = [], []
+    for i, path in enumerate(paths):
+        inputs += ["-i", path]
+        filters.append(
+            f"[{i}:v]scale={OUTPUT_WIDTH}:{OUTPUT_HEIGHT}:force_original_aspect_ratio=decrease,"
+            f"pad={OUTPUT_WIDTH}:{OUTPUT_HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+            f"fps={OUTPUT_FPS},format=yuv420p[v{i}]"
+        )
+    concat_inputs = "".join(f"[v{i}]" for i in range(len(paths)))
+    filters.append(f"{concat_inputs}concat=n={len(paths)}:v=1:a=0[out]")
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp.mp4"
+    command = [
+        FFMPEG_BIN, "-y", "-loglevel", "error", *inputs,
+        "-filter_complex", ";".join(filters), "-map", "[out]", "-an",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+        "-movflags", "+faststart", tmp_path,
+    ]
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=RENDER_TIMEOUT)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()[-500:]}")
+        os.replace(tmp_path, output_path)  # readers never see a partial file
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(paths)
+
+
+# ------------------ server side ------------------
+
+class StitchCache:
+    """
+    Disk cache of rendered sequences, evicted least recently used first once
+    the directory exceeds max_bytes. A hit refreshes the file's mtime, which
+    is what eviction orders by. Renders run in a process pool; concurrent
+    requests for the same sequence share one render.
+    """
+
+    def __init__(self, directory=STITCH_CACHE_DIR, max_bytes=STITCH_CACHE_MAX_BYTES, workers=RENDER_WORKERS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pending = {}  # key -> Future
+        self.failed = {}  # key -> (time, error)
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp4")
+
+    def get(self, key):
+        """Returns the cached file path (marking it recently used) or None."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        metrics.inc("stitch_cache_hits_total")
+        return path
+
+    def status(self, key):
+        """One of "ready", "rendering", "failed" or None if unknown."""
+        if os.path.exists(self.path(key)):
+            return "ready"
+        with self.lock:
+            if key in self.pending:
+                return "rendering"
+            failure = self.failed.get(key)
+            if failure and time.time() - failure[0] < FAILED_RETRY_AFTER:
+                return "failed"
+        return None
+
+    def error(self, key):
+        failure = self.failed.get(key)
+        return failure[1] if failure else None
+
+    def submit(self, key, clips):
+        """Starts rendering the sequence unless it is cached, already rendering or recently failed."""
+        status = self.status(key)
+        if status is not None:
+            return status
+        with self.lock:
+            if key in self.pending:
+                return "rendering"
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            future = self.executor.submit(render_sequence, clips, self.path(key))
+            self.pending[key] = future
+        future.add_done_callback(lambda f, key=key: self._finished(key, f))
+        return "rendering"
+
+    def _finished(self, key, future):
+        with self.lock:
+            self.pending.pop(key, None)
+            error = future.exception()
+            if error is None:
+                self.failed.pop(key, None)
+            else:
+                self.failed[key] = (time.time(), str(error))
+        metrics.inc("stitch_renders_total", result="ok" if error is None else "failed")
+        if error is None:
+            self.evict()
+
+    def evict(self):
+        """Deletes least recently used renders until the cache fits in max_bytes."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".mp4") and not entry.name.endswith(".tmp.mp4"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            metrics.inc("stitch_evictions_total")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+stitch_cache = StitchCache()
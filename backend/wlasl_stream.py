@@ -0,0 +1,89 @@
+# wlasl_stream.py
+# Incremental reader for WLASL_*.json annotation files (a top-level JSON array of
+# gloss entries). Entries are decoded one at a time, so memory stays flat no matter
+# how big the file is, and every entry comes with the byte offset right after it
+# so a long-running job can checkpoint and resume from there.
+import codecs
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_json_array(path, start_offset=0, chunk_size=1 << 16):
+    """
+    Yields (item, next_offset) for each element of the top-level array in `path`.
+    `next_offset` is a byte offset that can be passed back as `start_offset`
+    to continue with the following element.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        buf = ""
+        buf_offset = start_offset  # byte offset of buf[0] in the file
+        eof = False
+        state = "after_item" if start_offset else "start"
+        pos = 0
+
+        def fill():
+            nonlocal buf, eof
+            data = f.read(chunk_size)
+            if not data:
+                eof = True
+            buf += utf8.decode(data, final=not data)
+
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    if state in ("start", "item", "first_item"):
+                        raise ValueError(f"Unexpected end of {path}")
+                    return
+                fill()
+                continue
+
+            char = buf[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError(f"{path} is not a JSON array")
+                pos += 1
+                state = "first_item"
+            elif state in ("first_item", "after_item") and char == "]":
+                return
+            elif state == "after_item":
+                if char != ",":
+                    raise ValueError(f"Expected ',' at byte {buf_offset + len(buf[:pos].encode())} in {path}")
+                pos += 1
+                state = "item"
+            else:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                if end == len(buf) and not eof:
+                    fill()  # a number/literal could continue in the next chunk
+                    continue
+
+                next_offset = buf_offset + len(buf[:end].encode("utf-8"))
+                buf = buf[end:]
+                buf_offset = next_offset
+                pos = 0
+                state = "after_item"
+                yield item, next_offset
+
+
+def iter_glosses(path, start_offset=0):
+    """Yields (gloss_entry, next_offset) for each gloss in a WLASL annotation file."""
+    return iter_json_array(path, start_offset)
+
+
+def iter_instances(path):
+    """Yields (gloss_entry, instance) for every video instance in a WLASL annotation file."""
+    for entry, _ in iter_json_array(path):
+        for instance in entry.get("instances", []):
+            yield entry, instance